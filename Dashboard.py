@@ -1,79 +1,978 @@
-from flask import Flask, render_template, redirect, url_for, request
+from flask import Flask, Response, render_template, redirect, url_for, request, jsonify, g, has_request_context, send_from_directory
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.io as pio
+from pandas.api.types import union_categoricals
+import plotly
+import click
 import mysql.connector
 from mysql.connector import Error
 from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+import base64
+import csv
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import logging
 import os
+import queue
+import sys
+import threading
+import time
+import urllib.request
 
 app=Flask(__name__,template_folder='./template')
 
 
 ############################################### CONFIGURAR BANCO
-    
+
+# Os valores abaixo podem ser sobrescritos por variáveis de ambiente DASHBOARD_* (ver README),
+# para que a mesma instalação rode em desenvolvimento e produção sem editar o código
+
+def env_str(name, default=''):
+    return os.environ.get(name, default)
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
 db_config = {
-    'host': 'localhost',            # SEU HOST 
-    'user': '',                     # SEu USUÁRIO
-    'password': '',                 # SUA SENHA
-    'database': 'dados_dashboard',  # NOME DO BANCO CRIADO
-    'port': 3306                    # PORTA PADRÃO, MUDE CASO NECESSÁRIO
+    'host': env_str('DASHBOARD_DB_HOST', 'localhost'),              # SEU HOST
+    'user': env_str('DASHBOARD_DB_USER'),                           # SEu USUÁRIO
+    'password': env_str('DASHBOARD_DB_PASSWORD'),                   # SUA SENHA
+    'database': env_str('DASHBOARD_DB_NAME', 'dados_dashboard'),    # NOME DO BANCO CRIADO
+    'port': env_int('DASHBOARD_DB_PORT', 3306)                      # PORTA PADRÃO, MUDE CASO NECESSÁRIO
+}
+
+pool_config = {
+    'size': env_int('DASHBOARD_POOL_SIZE', 5),        # MÁXIMO DE CONEXÕES ABERTAS AO MESMO TEMPO
+    'timeout': env_int('DASHBOARD_POOL_TIMEOUT', 10), # SEGUNDOS DE ESPERA POR UMA CONEXÃO LIVRE
+    'ping_after': 30                                  # SEGUNDOS OCIOSA ANTES DE TESTAR A CONEXÃO NA RETIRADA
+}
+
+cache_config = {
+    'max_entries': 256,             # MÁXIMO DE PÁGINAS/RESULTADOS EM CACHE
+    'max_bytes': 64 * 1024 * 1024,  # TAMANHO MÁXIMO APROXIMADO DO CACHE
+    'historical_ttl': 24 * 60 * 60, # SEGUNDOS DE VALIDADE PARA DIAS/MESES PASSADOS
+    'current_ttl': 60,              # SEGUNDOS DE VALIDADE PARA O DIA/MÊS ATUAL
+    'sync_interval': 5              # SEGUNDOS ENTRE AS LEITURAS DAS INVALIDAÇÕES DOS OUTROS PROCESSOS
+}
+
+query_config = {
+    'workers': env_int('DASHBOARD_QUERY_WORKERS', 5), # CONSULTAS EXECUTADAS AO MESMO TEMPO (NÃO PASSE DO TAMANHO DO POOL)
+    'timeout': 20                                     # SEGUNDOS DE ESPERA POR CADA CONSULTA/SEÇÃO ANTES DE DESISTIR DELA
+}
+
+live_config = {
+    'interval': 15,                 # SEGUNDOS ENTRE AS CONSULTAS DO STATUS AO VIVO
+    'history': 240,                 # VERSÕES GUARDADAS PARA ENVIAR SÓ AS DIFERENÇAS A QUEM RECONECTA
+    'keepalive': 25                 # SEGUNDOS SEM MUDANÇAS ATÉ ENVIAR UM PING PARA MANTER A CONEXÃO
+}
+
+retention_config = {
+    'months': env_int('DASHBOARD_RETENTION_MONTHS', 24), # MESES DE SNAPSHOTS MANTIDOS EM dados (0 = MANTER TUDO)
+    'months_ahead': 3,                                   # PARTIÇÕES MENSAIS CRIADAS COM ANTECEDÊNCIA
+    'archive_dir': env_str('DASHBOARD_ARCHIVE_DIR')      # PASTA ONDE OS MESES EXPIRADOS SÃO ARQUIVADOS ANTES DE REMOVIDOS (VAZIO = NÃO ARQUIVAR)
+}
+
+alert_config = {
+    'silent_days': 3,               # DIAS SEM TRÁFEGO PARA UM EQUIPAMENTO CONECTADO GERAR ALERTA
+    'drift_hours': 24               # HORAS DESDE A ÚLTIMA CONEXÃO PARA UM EQUIPAMENTO "CONECTADO" GERAR ALERTA
+}
+
+dataframe_config = {
+    'chunk_rows': 10000             # LINHAS LIDAS DO BANCO POR VEZ (LIMITA A MEMÓRIA DE CADA CONSULTA)
+}
+
+ingest_config = {
+    'token': env_str('DASHBOARD_INGEST_TOKEN'), # TOKEN EXIGIDO NO CABEÇALHO X-Ingest-Token (VAZIO = API DESATIVADA)
+    'batch_size': 1000                          # LINHAS GRAVADAS POR INSERT NA INGESTÃO
 }
 
 ################################################################
 
-def create_connection():
-    """Cria e retorna uma conexão com o banco de dados."""
-    try:
-        connection = mysql.connector.connect(**db_config)
-        if connection.is_connected():
+class ConnectionPool:
+    """Mantém conexões abertas com o banco para reaproveitá-las entre consultas."""
+
+    def __init__(self, config, size=5, timeout=10, ping_after=30):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {
+            'checkouts': 0,     # Conexões entregues
+            'waits': 0,         # Retiradas que precisaram esperar uma conexão livre
+            'timeouts': 0,      # Retiradas que desistiram após 'timeout' segundos
+            'reconnects': 0,    # Conexões ociosas que caíram e foram refeitas
+            'connects': 0,      # Handshakes completos com o servidor
+            'errors': 0         # Falhas ao conectar
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _connect(self):
+        """Abre uma conexão nova, respeitando o limite do pool."""
+        try:
+            connection = mysql.connector.connect(**self.config)
+            self._count('connects')
             return connection
-    except Error as e:
-        print(f"Erro ao conectar ao banco de dados: {e}")
-    return None
+        except Error as e:
+            print(f"Erro ao conectar ao banco de dados: {e}")
+            with self._lock:
+                self._created -= 1
+            self._count('errors')
+            return None
 
-def fetch_data(query, params=None):
-    """Executa uma consulta SQL e retorna um DataFrame com os resultados."""
-    connection = create_connection()
-    if connection:
+    def _check(self, connection, last_used):
+        """Testa uma conexão ociosa e tenta reconectar caso o socket tenha caído."""
+        if time.monotonic() - last_used < self.ping_after:
+            return connection
+        try:
+            connection.ping(reconnect=False)
+            return connection
+        except Error:
+            pass
         try:
-            df = pd.read_sql(query, connection, params=params)
+            connection.reconnect(attempts=1)
+            self._count('reconnects')
+            return connection
         except Error as e:
-            print(f"Erro ao executar consulta: {e}")
+            print(f"Erro ao reconectar ao banco de dados: {e}")
+            with self._lock:
+                self._created -= 1
+            return None
+
+    def acquire(self, timeout=None):
+        """Retira uma conexão do pool, abrindo uma nova se houver espaço.
+
+        `timeout` substitui a espera padrão do pool por uma conexão livre.
+        """
+        while True:
+            try:
+                connection, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._created < self.size
+                    if can_create:
+                        self._created += 1
+                if can_create:
+                    connection = self._connect()
+                    if connection is not None:
+                        self._count('checkouts')
+                    return connection
+                self._count('waits')
+                try:
+                    connection, last_used = self._idle.get(timeout=self.timeout if timeout is None else timeout)
+                except queue.Empty:
+                    self._count('timeouts')
+                    print("Erro ao conectar ao banco de dados: nenhuma conexão livre no pool")
+                    return None
+            connection = self._check(connection, last_used)
+            if connection is not None:
+                self._count('checkouts')
+                return connection
+
+    def release(self, connection):
+        """Devolve a conexão ao pool, descartando-a se estiver quebrada."""
+        try:
+            # Encerra qualquer transação aberta para que a próxima consulta enxergue dados novos
+            connection.rollback()
+            self._idle.put((connection, time.monotonic()))
+        except Error:
+            with self._lock:
+                self._created -= 1
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def close_all(self):
+        """Fecha todas as conexões ociosas do pool."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def check(self, timeout):
+        """Testa o acesso ao banco com uma conexão do pool. Retorna None se estiver tudo
+        certo ou a descrição do problema."""
+        connection = self.acquire(timeout=timeout)
+        if connection is None:
+            return 'nenhuma conexão disponível no pool'
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return None
+        except Error as e:
+            return str(e)
+        finally:
+            self.release(connection)
+
+    def stats(self):
+        """Retorna os contadores de uso do pool."""
+        with self._lock:
+            created = self._created
+            stats = dict(self._stats)
+        idle = self._idle.qsize()
+        return dict(stats, size=self.size, open=created, idle=idle, in_use=created - idle)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Retorna o pool de conexões, criando-o no primeiro uso."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(db_config, **pool_config)
+    return _pool
+
+def create_connection():
+    """Retira e retorna uma conexão do pool do banco de dados."""
+    return get_pool().acquire()
+
+def release_connection(connection):
+    """Devolve ao pool uma conexão obtida com create_connection()."""
+    get_pool().release(connection)
+
+@contextmanager
+def pooled_connection():
+    """Fornece uma conexão do pool e a devolve ao final do bloco."""
+    connection = create_connection()
+    try:
+        yield connection
+    finally:
+        if connection:
+            release_connection(connection)
+
+############################################### INSTRUMENTAÇÃO
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Limites (em bytes) dos buckets do histograma de memória dos DataFrames
+MEMORY_BUCKETS = tuple(2 ** power for power in range(16, 30, 2))
+
+request_logger = logging.getLogger('dashboard.requests')
+if not request_logger.handlers:
+    request_logger.addHandler(logging.StreamHandler())
+    request_logger.setLevel(logging.INFO)
+
+class Histogram:
+    """Histograma de latências no formato do Prometheus, com uma série por valor do rótulo."""
+
+    def __init__(self, name, help_text, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}   # valor do rótulo -> [contagens por bucket, soma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        with self._lock:
+            series = self._series.setdefault(label_value, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[0][i] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        """Retorna as linhas do histograma no formato de texto do Prometheus."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for label_value, (counts, total, count) in sorted(series.items()):
+            label = f'{self.label}="{label_value}"'
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label}}} {total}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram('dashboard_request_duration_seconds', 'Tempo de resposta por rota.', 'route')
+QUERY_LATENCY = Histogram('dashboard_query_duration_seconds', 'Tempo de execução por consulta.', 'query')
+CONNECTION_WAIT = Histogram('dashboard_connection_wait_seconds', 'Espera por uma conexão do pool por consulta.', 'query')
+STEP_LATENCY = Histogram('dashboard_step_duration_seconds', 'Tempo por etapa (tabela, gráficos, template).', 'step')
+DATAFRAME_MEMORY = Histogram('dashboard_query_dataframe_bytes', 'Memória do DataFrame carregado por consulta.', 'query',
+                             buckets=MEMORY_BUCKETS)
+
+# Medições e falhas de tarefas rodando nas threads do QueryExecutor, repassadas à requisição no fim
+_worker_state = threading.local()
+
+def record_timing(name, seconds, description=''):
+    """Registra uma medição na requisição atual (vai para o Server-Timing e para o log)."""
+    if has_request_context() and 'timings' in g:
+        g.timings.append((name, seconds, description))
+    elif getattr(_worker_state, 'active', False):
+        _worker_state.timings.append((name, seconds, description))
+
+@contextmanager
+def timed(step):
+    """Mede o tempo do bloco como uma etapa da requisição."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STEP_LATENCY.observe(step, elapsed)
+        record_timing(step, elapsed)
+
+def observe_query(name, seconds, waited, rows, memory=None):
+    """Registra o tempo de uma consulta, a espera pela conexão, as linhas retornadas e a
+    memória do DataFrame."""
+    QUERY_LATENCY.observe(name, seconds)
+    CONNECTION_WAIT.observe(name, waited)
+    description = f'{rows} linhas, espera {waited * 1000:.1f} ms'
+    if memory is not None:
+        DATAFRAME_MEMORY.observe(name, memory)
+        description += f", {memory / (1024 * 1024):.1f} MB"
+    record_timing(f'q-{name}', seconds, description)
+
+def mark_db_error():
+    """Sinaliza que a requisição atual teve falha no banco (o resultado não deve ir para o cache)."""
+    if has_request_context():
+        g.db_error = True
+    elif getattr(_worker_state, 'active', False):
+        _worker_state.db_error = True
+
+def db_error_marked():
+    """Indica se a requisição (ou a tarefa do QueryExecutor) atual teve falha no banco."""
+    if has_request_context():
+        return bool(g.get('db_error'))
+    return getattr(_worker_state, 'db_error', False)
+
+############################################### CARREGAMENTO DOS DATAFRAMES
+
+# Tipos das colunas de cada consulta, pelo nome usado em fetch_data. Sem eles o
+# pandas guarda modelo, status e datas como objetos Python (dezenas de bytes por valor);
+# com eles cada valor ocupa de 1 a 8 bytes. Colunas ausentes do resultado são ignoradas.
+# 'category': categorias vindas dos dados; 'date': datetime64; 'time': timedelta64
+STATUS_DTYPE = pd.CategoricalDtype(['Conectado', 'Desconectado'])
+
+EQUIPAMENTOS_SCHEMA = {
+    'criacaoInsert': 'date',
+    'atualizadoEm': 'date',
+    'modeloEquip': 'category',
+    'portaEquip': 'UInt16',
+    'statusEquip': STATUS_DTYPE,
+    'dataUltimaConexao': 'date',
+    'horaUltimaconexao': 'time',
+    'dataUltimoRegistro': 'date',
+}
+
+ALERTAS_SCHEMA = dict(EQUIPAMENTOS_SCHEMA, tipo='category', diasSemTrafego='Int32', horasSemConexao='Int32')
+
+QUERY_SCHEMAS = {
+    'status_ao_vivo': EQUIPAMENTOS_SCHEMA,
+    'dados_pagina': EQUIPAMENTOS_SCHEMA,
+    'historico_equipamento': EQUIPAMENTOS_SCHEMA,
+    'alertas_estado': EQUIPAMENTOS_SCHEMA,
+    'alertas': ALERTAS_SCHEMA,
+}
+
+# Valores de texto medidos por coluna para estimar a memória (medir todos custaria mais que a consulta)
+MEMORY_SAMPLE_SIZE = 1000
+
+def apply_schema(df, schema):
+    """Converte as colunas do DataFrame para os tipos compactos do schema."""
+    for column, dtype in (schema or {}).items():
+        if column not in df:
+            continue
+        values = df[column]
+        if dtype == 'date':
+            df[column] = pd.to_datetime(values, errors='coerce')
+        elif dtype == 'time':
+            # TIME chega como timedelta do mysql.connector (ou texto HH:MM:SS)
+            df[column] = pd.to_timedelta(values, errors='coerce')
+        elif dtype in ('UInt16', 'Int32'):
+            numbers = pd.to_numeric(values, errors='coerce')
+            info = np.iinfo(dtype.lower())
+            # Valores fora da faixa do tipo são inválidos e viram nulos
+            df[column] = numbers.where(numbers.between(info.min, info.max)).astype(dtype)
+        else:
+            df[column] = values.astype(dtype)
+    return df
+
+def dataframe_bytes(df):
+    """Memória aproximada do DataFrame, com as colunas de texto estimadas por amostra."""
+    total = int(df.memory_usage(deep=False).sum())
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == object and len(values):
+            sample = values.iloc[::max(len(values) // MEMORY_SAMPLE_SIZE, 1)]
+            total += int(sum(sys.getsizeof(value) for value in sample) / len(sample) * len(values))
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            total += int(values.cat.categories.memory_usage(deep=True))
+    return total
+
+def _concat_chunks(chunks):
+    """Junta os blocos de uma consulta mantendo as colunas categóricas compactas."""
+    if len(chunks) == 1:
+        return chunks[0]
+    for column in chunks[0].columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            # Blocos com categorias diferentes viram objeto no concat; alinha as categorias antes
+            categories = union_categoricals([chunk[column] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+def _query_chunks(connection, query, params, schema, chunk_rows):
+    """Lê o resultado da consulta em blocos de até `chunk_rows` linhas, já com os tipos do schema."""
+    for chunk in pd.read_sql(query, connection, params=params, chunksize=chunk_rows):
+        yield apply_schema(chunk, schema)
+
+def fetch_data(query, params=None, name='consulta', schema=None):
+    """Executa uma consulta SQL e retorna um DataFrame com os resultados.
+
+    `name` identifica a consulta nas métricas e no cabeçalho Server-Timing e escolhe os
+    tipos das colunas em QUERY_SCHEMAS (ou em `schema`). O resultado é lido em blocos de
+    dataframe_config['chunk_rows'] linhas, convertidos antes de ler o próximo, então só um
+    bloco por vez fica com os valores como objetos Python.
+    """
+    schema = QUERY_SCHEMAS.get(name) if schema is None else schema
+    start = time.perf_counter()
+    with pooled_connection() as connection:
+        waited = time.perf_counter() - start
+        if connection:
+            try:
+                df = _concat_chunks(list(_query_chunks(connection, query, params, schema,
+                                                       dataframe_config['chunk_rows'])))
+            except Error as e:
+                print(f"Erro ao executar consulta: {e}")
+                df = pd.DataFrame()
+                mark_db_error()
+        else:
             df = pd.DataFrame()
+            mark_db_error()
+    observe_query(name, time.perf_counter() - start - waited, waited, len(df), dataframe_bytes(df))
+    return df
+
+############################################### CONSULTAS EM PARALELO
+
+def run_tracked(func, *args, **kwargs):
+    """Executa `func` fora da requisição e retorna (resultado, medições, falha no banco)."""
+    _worker_state.active = True
+    _worker_state.timings = []
+    _worker_state.db_error = False
+    try:
+        return func(*args, **kwargs), _worker_state.timings, _worker_state.db_error
+    finally:
+        _worker_state.active = False
+
+class PendingResult:
+    """Resultado de uma tarefa enviada ao QueryExecutor."""
+
+    def __init__(self, label, future, deadline):
+        self.label = label
+        self._future = future
+        self._deadline = deadline
+
+    def result(self, default=None):
+        """Espera a tarefa até o tempo limite e retorna seu resultado, ou `default` se ela falhar.
+
+        A falha (erro ou tempo esgotado) fica isolada nesta tarefa: a seção correspondente
+        sai vazia e a requisição é marcada com erro no banco para não ir para o cache.
+        """
+        try:
+            value, timings, db_error = self._future.result(timeout=max(self._deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            # Se ainda não começou, não ocupa mais uma thread; se já começou, a conexão
+            # volta ao pool quando a consulta terminar
+            self._future.cancel()
+            print(f"Erro ao executar consulta: '{self.label}' excedeu o tempo limite")
+            mark_db_error()
+            return default
+        except Exception as e:
+            print(f"Erro ao executar consulta: '{self.label}' falhou: {e}")
+            mark_db_error()
+            return default
+        for timing in timings:
+            record_timing(*timing)
+        if db_error:
+            mark_db_error()
+        return value
+
+
+class QueryExecutor:
+    """Executa consultas e seções independentes ao mesmo tempo em um número limitado de threads.
+
+    Cada thread retira sua própria conexão do pool, então `workers` não deve passar do
+    tamanho do pool de conexões.
+    """
+
+    def __init__(self, workers=5, timeout=20):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='consulta')
+
+    def submit(self, label, func, *args, **kwargs):
+        """Agenda `func(*args, **kwargs)` e retorna um PendingResult identificado por `label`."""
+        deadline = time.monotonic() + self.timeout
+        if getattr(_worker_state, 'active', False):
+            # Dentro de uma thread do executor a tarefa roda na hora, para não esperar
+            # por uma thread livre que pode nunca aparecer
+            future = Future()
+            try:
+                future.set_result((func(*args, **kwargs), [], False))
+            except Exception as e:
+                future.set_exception(e)
+            return PendingResult(label, future, deadline)
+        return PendingResult(label, self._executor.submit(run_tracked, func, *args, **kwargs), deadline)
+
+
+query_executor = QueryExecutor(**query_config)
+
+############################################### CACHE DE RESPOSTAS
+
+def _estimate_size(value):
+    """Estima o tamanho em bytes de um valor guardado no cache."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sum(_estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+class ResponseCache:
+    """Cache LRU em memória com validade por entrada e invalidação por data.
+
+    Cada processo (worker do gunicorn) tem o seu cache. As invalidações gravadas em
+    cache_invalidacoes (ver invalidate_cache) são aplicadas por todos os processos na
+    leitura seguinte, no máximo `sync_interval` segundos depois.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, historical_ttl=86400, current_ttl=60,
+                 sync_interval=5):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.historical_ttl = historical_ttl
+        self.current_ttl = current_ttl
+        self.sync_interval = sync_interval
+        self._entries = OrderedDict()   # chave -> (valor, expira_em, tamanho, tags)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        self._sync_lock = threading.Lock()
+        self._synced_at = None          # Última leitura de cache_invalidacoes (time.monotonic)
+        self._last_invalidation = None  # Última invalidação já aplicada (idInvalidacao)
+
+    def ttl_for(self, last_date):
+        """Validade para dados que terminam em `last_date`: longa se já passou, curta se é hoje."""
+        return self.historical_ttl if last_date < datetime.now().date() else self.current_ttl
+
+    def _remove(self, key):
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        """Retorna o valor em cache ou None se não existir ou tiver expirado."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(key)
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key, value, ttl, tags=()):
+        """Guarda um valor, descartando as entradas menos usadas se o cache estiver cheio."""
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size, frozenset(tags))
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def get_or_set(self, key, compute, ttl, tags=()):
+        """Retorna o valor em cache ou o calcula com `compute()` e o guarda."""
+        self.sync()
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            # Páginas montadas com o banco fora do ar ficariam vazias até expirar
+            if not db_error_marked():
+                self.set(key, value, ttl, tags)
+        return value
+
+    def invalidate_date(self, date):
+        """Remove as entradas do dia informado e do mês ao qual ele pertence."""
+        tags = {date.isoformat(), date.strftime('%Y-%m')}
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[3] & tags]:
+                self._remove(key)
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def sync(self):
+        """Aplica as invalidações gravadas pelos outros processos desde a última leitura."""
+        if self.sync_interval is None:
+            return
+        now = time.monotonic()
+        if (self._synced_at is not None and now - self._synced_at < self.sync_interval) \
+                or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._synced_at = now
+            result = read_invalidations(self._last_invalidation)
+            if result is None:
+                return
+            self._last_invalidation, dates = result
+            for date in dates:
+                if date is None:
+                    self.clear()
+                else:
+                    self.invalidate_date(date)
+        finally:
+            self._sync_lock.release()
+
+    def stats(self):
+        """Retorna os contadores de acertos e falhas do cache."""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+
+
+# Log de invalidações compartilhado pelos processos (migração 008). As linhas mais antigas
+# são apagadas: qualquer processo ativo já as leu poucos segundos depois de gravadas
+CACHE_INVALIDATIONS_KEPT = 1000
+
+def read_invalidations(after_id):
+    """Retorna (última idInvalidacao, datas invalidadas depois de `after_id`) ou None sem banco.
+
+    None na lista de datas invalida o cache inteiro. Sem `after_id` (primeira leitura do
+    processo, com o cache ainda vazio) retorna só a última idInvalidacao.
+    """
+    with pooled_connection() as connection:
+        if not connection:
+            return None
+        cursor = connection.cursor()
+        try:
+            if after_id is None:
+                cursor.execute("SELECT COALESCE(MAX(idInvalidacao), 0) FROM cache_invalidacoes")
+                return cursor.fetchone()[0], []
+            cursor.execute("SELECT idInvalidacao, dataReferencia FROM cache_invalidacoes "
+                           "WHERE idInvalidacao > %s ORDER BY idInvalidacao", (after_id,))
+            rows = cursor.fetchall()
+        except Error as e:
+            print(f"Erro ao ler as invalidações do cache: {e}")
+            return None
+        finally:
+            cursor.close()
+    if not rows:
+        return after_id, []
+    return rows[-1][0], [None if day is None else pd.Timestamp(day).date() for _, day in rows]
+
+def publish_invalidation(date=None):
+    """Grava em cache_invalidacoes a invalidação de um dia (ou de tudo) para os outros processos."""
+    with pooled_connection() as connection:
+        if not connection:
+            return False
+        cursor = connection.cursor()
+        try:
+            cursor.execute("INSERT INTO cache_invalidacoes (dataReferencia) VALUES (%s)", (date,))
+            cursor.execute("DELETE FROM cache_invalidacoes WHERE idInvalidacao <= %s",
+                           (cursor.lastrowid - CACHE_INVALIDATIONS_KEPT,))
+            connection.commit()
+            return True
+        except Error as e:
+            print(f"Erro ao gravar a invalidação do cache: {e}")
+            return False
         finally:
-            connection.close()
+            cursor.close()
+
+def invalidate_cache(date=None):
+    """Descarta as páginas de um dia (ou todas) neste processo e publica para os demais."""
+    if date is None:
+        response_cache.clear()
     else:
-        df = pd.DataFrame()
-    return df
+        response_cache.invalidate_date(date)
+    return publish_invalidation(date)
+
+response_cache = ResponseCache(**cache_config)
+
+############################################### CONSULTAS DO DASHBOARD
+
+# Snapshot completo de um dia (dashboard diário e tabela de dados)
+GERAL_QUERY = """
+SELECT modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip, dataUltimaConexao, horaUltimaconexao, dataUltimoRegistro
+FROM dados
+WHERE criacaoInsert = %s
+ORDER BY dataUltimaConexao DESC, horaUltimaconexao DESC, dataUltimoRegistro DESC
+"""
+
+# Equipamentos que efetuaram conexão no dia. Só snapshots gravados a partir do dia podem
+# ter essa data de conexão; o limite em criacaoInsert descarta as partições mais antigas
+DIA_ATUAL_QUERY = """
+SELECT modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip, dataUltimaConexao, horaUltimaconexao, dataUltimoRegistro
+FROM dados
+WHERE dataUltimaConexao = %s AND criacaoInsert >= %s
+ORDER BY dataUltimaConexao DESC, horaUltimaconexao DESC
+"""
+
+# Para o dia atual, os mesmos dados vêm da tabela de estado atual (uma linha por
+# equipamento), sem filtrar o histórico de snapshots
+ESTADO_GERAL_QUERY = """
+SELECT modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip, dataUltimaConexao, horaUltimaConexao AS horaUltimaconexao, dataUltimoRegistro
+FROM equipamentos_estado_atual
+WHERE atualizadoEm = %s
+ORDER BY dataUltimaConexao DESC, horaUltimaConexao DESC, dataUltimoRegistro DESC
+"""
+
+# Totalizadores do dashboard diário contados pelo banco: cada consulta retorna uma única
+# linha, sem trazer os equipamentos. Totais do snapshot gravado no dia, já agregados no
+# rollup (mesmas contagens por criacaoInsert, mantidas pelos triggers da migração 003)
+ROLLUP_RESUMO_QUERY = """
+SELECT total AS total_equipamentos, conectados, desconectados
+FROM dados_daily_rollup
+WHERE data = %s
+"""
+
+# Os mesmos totais contados no snapshot (mesmo filtro de GERAL_QUERY), para dias que
+# ainda não estão no rollup
+RESUMO_GERAL_QUERY = """
+SELECT
+    COUNT(*) AS total_equipamentos,
+    COUNT(CASE WHEN statusEquip = 'Conectado' THEN 1 END) AS conectados,
+    COUNT(CASE WHEN statusEquip = 'Desconectado' THEN 1 END) AS desconectados
+FROM dados
+WHERE criacaoInsert = %s
+"""
+
+# Equipamentos que conectaram no dia (mesmo filtro de DIA_ATUAL_QUERY) e o tráfego deles.
+# Recebe (dia, dia, dia anterior, dia, dia)
+RESUMO_DIA_QUERY = """
+SELECT
+    COUNT(*) AS total_today,
+    COUNT(CASE WHEN statusEquip = 'Conectado' THEN 1 END) AS conectados_today,
+    COUNT(CASE WHEN statusEquip = 'Desconectado' THEN 1 END) AS desconectados_today,
+    COUNT(CASE WHEN dataUltimoRegistro <= %s THEN 1 END) AS total_equips_trafego,
+    COUNT(CASE WHEN dataUltimoRegistro IN (%s, %s) THEN 1 END) AS total_trafegaram_recente
+FROM dados
+WHERE dataUltimaConexao = %s AND criacaoInsert >= %s
+"""
+
+# Os mesmos totalizadores para o dia atual, a partir da tabela de estado atual
+ESTADO_RESUMO_GERAL_QUERY = """
+SELECT
+    COUNT(*) AS total_equipamentos,
+    COUNT(CASE WHEN statusEquip = 'Conectado' THEN 1 END) AS conectados,
+    COUNT(CASE WHEN statusEquip = 'Desconectado' THEN 1 END) AS desconectados
+FROM equipamentos_estado_atual
+WHERE atualizadoEm = %s
+"""
+
+# Recebe (dia, dia, dia anterior, dia)
+ESTADO_RESUMO_DIA_QUERY = """
+SELECT
+    COUNT(*) AS total_today,
+    COUNT(CASE WHEN statusEquip = 'Conectado' THEN 1 END) AS conectados_today,
+    COUNT(CASE WHEN statusEquip = 'Desconectado' THEN 1 END) AS desconectados_today,
+    COUNT(CASE WHEN dataUltimoRegistro <= %s THEN 1 END) AS total_equips_trafego,
+    COUNT(CASE WHEN dataUltimoRegistro IN (%s, %s) THEN 1 END) AS total_trafegaram_recente
+FROM equipamentos_estado_atual
+WHERE dataUltimaConexao = %s
+"""
+
+# Totais diários do mês a partir do rollup (no máximo 31 linhas). Recebe o intervalo
+# [primeiro dia do mês, primeiro dia do mês seguinte)
+ROLLUP_MENSAL_QUERY = """
+SELECT data AS day, total AS equipsMovimentacao, conectados AS equipsConectados, desconectados AS equipsDesconectados
+FROM dados_daily_rollup
+WHERE data >= %s AND data < %s
+ORDER BY data
+"""
+
+# Recalcula o rollup a partir de dados para o intervalo [início, fim)
+ROLLUP_BACKFILL_QUERY = """
+REPLACE INTO dados_daily_rollup (data, total, conectados, desconectados, com_trafego)
+SELECT
+    criacaoInsert,
+    COUNT(*),
+    COUNT(CASE WHEN statusEquip = 'Conectado' THEN 1 END),
+    COUNT(CASE WHEN statusEquip = 'Desconectado' THEN 1 END),
+    COUNT(CASE WHEN dataUltimoRegistro >= criacaoInsert - INTERVAL 1 DAY THEN 1 END)
+FROM dados
+WHERE criacaoInsert >= %s AND criacaoInsert < %s
+GROUP BY criacaoInsert
+"""
+
+# Totais diários de um intervalo qualquer [início, fim) a partir do rollup
+ROLLUP_PERIODO_QUERY = """
+SELECT data, total, conectados, desconectados, com_trafego
+FROM dados_daily_rollup
+WHERE data >= %s AND data < %s
+ORDER BY data
+"""
+
+# Snapshots de um equipamento no intervalo [início, fim), um por dia
+HISTORICO_EQUIPAMENTO_QUERY = """
+SELECT criacaoInsert, modeloEquip, ipEquip, portaEquip, statusEquip, dataUltimaConexao, horaUltimaConexao AS horaUltimaconexao, dataUltimoRegistro
+FROM dados
+WHERE numSerieEquip = %s AND criacaoInsert >= %s AND criacaoInsert < %s
+ORDER BY criacaoInsert, idDado
+"""
+
+def month_range(year, month):
+    """Retorna o primeiro dia do mês e o primeiro dia do mês seguinte."""
+    start = datetime(year, month, 1).date()
+    end = datetime(year + month // 12, month % 12 + 1, 1).date()
+    return start, end
+
+def dashboard_queries(actual_date):
+    """Lista (nome, consulta, parâmetros) de todas as consultas executadas pelos dashboards."""
+    month_params = month_range(actual_date.year, actual_date.month)
+    return [
+        ('geral', GERAL_QUERY, (actual_date,)),
+        ('dia_atual', DIA_ATUAL_QUERY, (actual_date, actual_date)),
+        ('estado_geral', ESTADO_GERAL_QUERY, (actual_date,)),
+        ('rollup_resumo', ROLLUP_RESUMO_QUERY, (actual_date,)),
+        ('resumo_geral', RESUMO_GERAL_QUERY, (actual_date,)),
+        ('resumo_dia', RESUMO_DIA_QUERY, summary_params(actual_date, today=False)),
+        ('estado_resumo_geral', ESTADO_RESUMO_GERAL_QUERY, (actual_date,)),
+        ('estado_resumo_dia', ESTADO_RESUMO_DIA_QUERY, summary_params(actual_date, today=True)),
+        ('dados_pagina', *dados_page_query(dados_page_state(actual_date), DADOS_PAGE_SIZE)),
+        ('dados_pagina_registro', *dados_page_query(dados_page_state(actual_date, sort='registro'), DADOS_PAGE_SIZE)),
+        ('dados_pagina_seguinte', *dados_page_query(
+            dict(dados_page_state(actual_date), key=[actual_date.isoformat(), None, None, 0]), DADOS_PAGE_SIZE)),
+        ('rollup_mensal', ROLLUP_MENSAL_QUERY, month_params),
+        ('rollup_periodo', ROLLUP_PERIODO_QUERY, (actual_date - timedelta(days=365), actual_date + timedelta(days=1))),
+        ('historico_equipamento', HISTORICO_EQUIPAMENTO_QUERY,
+         ('', actual_date - timedelta(days=365), actual_date + timedelta(days=1))),
+        ('alertas', *alerts_query('sem_trafego')),
+    ]
+
+def daily_counters(df, df_today, actual_date, previous_date):
+    """Calcula os totalizadores do dashboard diário a partir dos DataFrames já buscados.
+
+    `df` contém o snapshot do dia (criacaoInsert = data) e `df_today` os equipamentos
+    que conectaram no dia (dataUltimaConexao = data).
+    """
+    counters = {}
+
+    status = df['statusEquip'] if 'statusEquip' in df else pd.Series(dtype=object)
+    counters['total_equipamentos'] = len(df)
+    counters['conectados'] = int((status == 'Conectado').sum())
+    counters['desconectados'] = int((status == 'Desconectado').sum())
+
+    status_today = df_today['statusEquip'] if 'statusEquip' in df_today else pd.Series(dtype=object)
+    counters['total_today'] = len(df_today)
+    counters['conectados_today'] = int((status_today == 'Conectado').sum())
+    counters['desconectados_today'] = int((status_today == 'Desconectado').sum())
+
+    # Datas nulas viram NaT e ficam de fora das comparações, como no SQL
+    ultimo_registro = pd.to_datetime(df_today.get('dataUltimoRegistro', pd.Series(dtype=object)))
+    actual_ts = pd.Timestamp(actual_date)
+    previous_ts = pd.Timestamp(previous_date)
+    counters['total_equips_trafego'] = int((ultimo_registro <= actual_ts).sum())
+    counters['total_trafegaram_recente'] = int(((ultimo_registro == actual_ts) | (ultimo_registro == previous_ts)).sum())
+
+    return counters
+
+def monthly_averages(df_rollup):
+    """Calcula as médias diárias do mês (arredondadas para baixo) a partir do rollup."""
+    averages = {}
+    for column in ['equipsMovimentacao', 'equipsConectados', 'equipsDesconectados']:
+        # Dias sem nenhum equipamento no status não entram na média, como nas consultas antigas
+        values = df_rollup[column][df_rollup[column] > 0] if column in df_rollup else pd.Series(dtype=float)
+        averages[column] = int(values.mean()) if len(values) else None
+    return averages
+
+def _escape_column(column):
+    """Converte a coluna em texto e escapa os caracteres especiais de HTML."""
+    return (column.astype(str)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False)
+            .str.replace('"', '&quot;', regex=False)
+            .str.replace("'", '&#x27;', regex=False))
+
+def _format_date_column(column):
+    """Formata as datas (datetime64 de EQUIPAMENTOS_SCHEMA) como AAAA-MM-DD."""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.dt.strftime('%Y-%m-%d').fillna('None')
+    return column
+
+def _format_nullable_column(column):
+    """Colunas com nulos tipados (UInt16, categorias) exibem os nulos como as demais colunas."""
+    return column.astype(object).where(column.notna(), None)
+
+def _format_time_column(column):
+    """Formata horaUltimaconexao (timedelta64 de EQUIPAMENTOS_SCHEMA) como HH:MM:SS."""
+    if pd.api.types.is_timedelta64_dtype(column):
+        return (pd.Timestamp(0) + column).dt.strftime('%H:%M:%S').fillna('NaT')
+    return column
 
 def generate_data_html(df, actual_date):
     """Gera o HTML para a tabela de dados com base na data fornecida."""
-    rows_html = ""
-    for _, row in df.iterrows():
-        # Certifique-se de que row['dataUltimaConexao'] é um datetime.date
-        row_date = row['dataUltimaConexao'].date() if isinstance(row['dataUltimaConexao'], pd.Timestamp) else row['dataUltimaConexao']
-        date_class = "bg-warning" if row_date != actual_date else ""
-        
-        # Formatar horaUltimaconexao
-        if isinstance(row['horaUltimaconexao'], pd.Timedelta):
-            hora_formatada = str(row['horaUltimaconexao']).split(' ')[-1]  # Extrai o tempo no formato HH:MM:SS
-        else:
-            hora_formatada = row['horaUltimaconexao']  # Presume que já está em formato correto
-        
-        row_html = f"""
-        <tr class="{date_class}">
-            <td>{row['modeloEquip']}</td>
-            <td>{row['numSerieEquip']}</td>
-            <td>{row['ipEquip']}</td>
-            <td>{row['portaEquip']}</td>
-            <td>{row['statusEquip']}</td>
-            <td>{row['dataUltimaConexao']}</td>
-            <td>{hora_formatada}</td>
-            <td>{row['dataUltimoRegistro']}</td>
-        </tr>
-        """
-        rows_html += row_html
+    if df.empty:
+        rows_html = ""
+    else:
+        # Linhas cuja última conexão não é a data do dashboard ficam destacadas
+        connection_dates = pd.to_datetime(df['dataUltimaConexao'], errors='coerce').dt.normalize()
+        date_class = pd.Series('', index=df.index).where(connection_dates == pd.Timestamp(actual_date), 'bg-warning')
+        # Equipamentos com alerta (equipamentos_alertas) ficam em vermelho, com os tipos no title
+        row_attributes = ''
+        if 'alertas' in df:
+            alerts = df['alertas'].where(df['alertas'].notna(), '').astype(str)
+            date_class = date_class.where(alerts == '', 'table-danger')
+            escaped = _escape_column(alerts)
+            row_attributes = pd.Series('', index=df.index).where(
+                alerts == '', ' data-alertas="' + escaped + '" title="Alertas: ' + escaped.str.replace(',', ', ') + '"')
+
+        cells = [
+            _escape_column(_format_nullable_column(df['modeloEquip'])),
+            _escape_column(df['numSerieEquip']),
+            _escape_column(df['ipEquip']),
+            _escape_column(_format_nullable_column(df['portaEquip'])),
+            _escape_column(_format_nullable_column(df['statusEquip'])),
+            _escape_column(_format_date_column(df['dataUltimaConexao'])),
+            _escape_column(_format_time_column(df['horaUltimaconexao'])),
+            _escape_column(_format_date_column(df['dataUltimoRegistro'])),
+        ]
+
+        # Monta todas as linhas coluna a coluna e junta tudo uma única vez
+        rows = '\n        <tr class="' + date_class + '"' + row_attributes + '>'
+        for cell in cells:
+            rows = rows + '\n            <td>' + cell + '</td>'
+        rows = rows + '\n        </tr>\n        '
+        rows_html = ''.join(rows.tolist())
 
     data_html = f"""
     <table class="table table-striped table-bordered">
@@ -96,400 +995,1234 @@ def generate_data_html(df, actual_date):
     """
     return data_html
 
-@app.route('/')
-def index():
-    
-    ############################################### VARIÁVEIS IMPORTANTES
-    
-    selected_date = request.args.get('selected_date', default=pd.Timestamp.now().strftime('%Y-%m-%d'), type=str)
-    actual_date = pd.to_datetime(selected_date).date()
-    previous_date = actual_date - timedelta(days=1)
-    
-    actual_date_day = actual_date.day
-    actual_date_month = actual_date.month
-    actual_date_year = actual_date.year
-    
-    previous_date_day = previous_date.day
-    previous_date_month = previous_date.month
-    
-    formatted_actual_day_month = f"{actual_date_day:02d}/{actual_date_month:02d}"
-    formatted_actual_complete = f"{actual_date_day:02d}/{actual_date_month:02d}/{actual_date_year}"
-    
-    formatted_previous_day_month = f"{previous_date_day:02d}/{previous_date_month:02d}"
-    
-    ############################################### GERAÇÃO DE DADOS GERAL
-    geral_query = """
-    SELECT modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip, dataUltimaConexao, horaUltimaconexao, dataUltimoRegistro
-    FROM dados
-    WHERE criacaoInsert = %s
-    ORDER BY dataUltimaConexao DESC, horaUltimaconexao DESC, dataUltimoRegistro DESC
+############################################### TENDÊNCIAS E HISTÓRICO POR EQUIPAMENTO
+
+PERIODO_PADRAO_DIAS = 30        # Intervalo usado quando só o fim (ou nada) é informado
+PERIODO_MAX_DIAS = 5 * 366      # Maior intervalo aceito nas APIs de tendência e histórico
+
+# Agrupamento automático: dias até 2 meses, semanas até 1 ano e meses acima disso
+AGRUPAMENTOS = ('dia', 'semana', 'mes')
+AGRUPAMENTO_MAX_DIAS = {'dia': 62, 'semana': 366}
+
+def parse_period(start, end, bucket='auto'):
+    """Valida o intervalo (datas AAAA-MM-DD, inclusive) e retorna (início, fim, agrupamento).
+
+    Levanta ValueError com a mensagem para o cliente se algo for inválido.
     """
-    geral_params = (actual_date,)
-    df = fetch_data(geral_query, params=geral_params)
+    try:
+        end_date = pd.to_datetime(end).date() if end else datetime.now().date()
+        start_date = pd.to_datetime(start).date() if start else end_date - timedelta(days=PERIODO_PADRAO_DIAS - 1)
+    except ValueError:
+        raise ValueError("datas inválidas: use start e end no formato AAAA-MM-DD")
+    days = (end_date - start_date).days + 1
+    if days < 1:
+        raise ValueError("start deve ser anterior ou igual a end")
+    if days > PERIODO_MAX_DIAS:
+        raise ValueError(f"intervalo máximo de {PERIODO_MAX_DIAS} dias")
+    if bucket in (None, '', 'auto'):
+        bucket = next((name for name, limit in AGRUPAMENTO_MAX_DIAS.items() if days <= limit), 'mes')
+    elif bucket not in AGRUPAMENTOS:
+        raise ValueError(f"agrupamento inválido: use auto, {', '.join(AGRUPAMENTOS)}")
+    return start_date, end_date, bucket
 
-    total_equipamentos = fetch_data("""
-    SELECT COUNT(*) AS equipsCadastrados
-    FROM dados
-    WHERE criacaoInsert = %s
-    """, params=geral_params).iloc[0]['equipsCadastrados']
+def period_tags(start_date, end_date):
+    """Tags de cache (meses AAAA-MM) de um intervalo, para invalidate_date alcançar o resultado."""
+    return tuple(str(period) for period in pd.period_range(start_date, end_date, freq='M'))
 
-    conectados = fetch_data("""
-    SELECT COUNT(*) AS equipsConectados
-    FROM dados
-    WHERE statusEquip = 'Conectado' AND criacaoInsert = %s
-    """, params=geral_params).iloc[0]['equipsConectados']
+def bucket_start(dates, bucket):
+    """Primeiro dia do período (dia, semana iniciando na segunda ou mês) de cada data."""
+    dates = pd.to_datetime(dates).dt.normalize()
+    if bucket == 'semana':
+        return dates - pd.to_timedelta(dates.dt.weekday, unit='D')
+    if bucket == 'mes':
+        return dates.dt.to_period('M').dt.start_time
+    return dates
 
-    desconectados = fetch_data("""
-    SELECT COUNT(*) AS equipsDesconectados
-    FROM dados
-    WHERE statusEquip = 'Desconectado' AND criacaoInsert = %s
-    """, params=geral_params).iloc[0]['equipsDesconectados']
+def _ratio(part, total):
+    return round(float(part) / float(total), 4) if total else None
 
-    color_map_geral = {
-        'Conectado': '#0f6636',
-        'Desconectado': '#dcdcdc'
+def fleet_trend(df_rollup, bucket):
+    """Médias diárias da frota e disponibilidade (conectados / total) por período."""
+    if df_rollup.empty:
+        return {'disponibilidade': None, 'pontos': []}
+    groups = df_rollup.groupby(bucket_start(df_rollup['data'], bucket), sort=True)
+    points = []
+    for period, group in groups:
+        points.append({
+            'inicio': period.date().isoformat(),
+            'dias': len(group),
+            'total_medio': round(float(group['total'].mean()), 1),
+            'conectados_medio': round(float(group['conectados'].mean()), 1),
+            'desconectados_medio': round(float(group['desconectados'].mean()), 1),
+            'com_trafego_medio': round(float(group['com_trafego'].mean()), 1),
+            'disponibilidade': _ratio(group['conectados'].sum(), group['total'].sum()),
+        })
+    return {
+        'disponibilidade': _ratio(df_rollup['conectados'].sum(), df_rollup['total'].sum()),
+        'pontos': points,
     }
 
-    fig_all = px.pie(
-        df,
-        names='statusEquip',
-        title='Geral - Conectados x Desconectados',
-        color='statusEquip',
-        color_discrete_map=color_map_geral,
-    )
+def device_history(df, bucket):
+    """Disponibilidade, mudanças de status e dias sem tráfego de um equipamento, por período.
 
-    fig_all.update_traces(textfont_size=30)             # Ajusta o tamanho da fonte dos valores
-    fig_all.update_layout(title_font_size=22)           # Ajusta o tamanho da fonte do título
-    fig_all.update_layout(legend_title_font_size=12)    # Ajusta o tamanho da fonte da legenda
-    fig_all.update_layout(legend_font_size=12)          # Ajusta o tamanho da caixa da legenda
-    fig_all.update_layout(title_x=0.5)                  # Centraliza o título horizontalmente
-    fig_all.update_layout(
-        legend_title_font_size=12,  # Ajusta o tamanho do título da legenda
-        legend_font_size=12,        # Ajusta o tamanho do texto da legenda
-        legend_orientation="h",     # Muda a orientação da legenda para horizontal
-        legend_yanchor="top",       # Alinha a legenda ao topo da posição y
-        legend_y=-0.2,              # Ajuste a posição vertical da legenda para baixo
-        legend_x=0.5,               # Centraliza a legenda horizontalmente
-        legend_xanchor="center",    # Alinha a legenda ao centro da posição x
-    )
-    
-    graph_html_all = pio.to_html(fig_all, full_html=False)  # Converter o gráfico para HTML
-    
-    
-    
-    ############################################### GERAÇÃO DE DADOS DO DIA ATUAL
-    
-    dia_atual_query = """
-    SELECT modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip, dataUltimaConexao, horaUltimaconexao, dataUltimoRegistro
-    FROM dados
-    WHERE dataUltimaConexao = %s
-    ORDER BY dataUltimaConexao DESC, horaUltimaconexao DESC
+    `df` traz um snapshot por dia (HISTORICO_EQUIPAMENTO_QUERY). Uma mudança de status é
+    contada no período do dia em que o novo status aparece.
     """
-    df_today = fetch_data(dia_atual_query, params=(actual_date,))
-    
-    color_map_today = {
-        'Conectado': '#0f6636',
-        'Desconectado': '#dcdcdc'
+    df = df.drop_duplicates('criacaoInsert', keep='last').reset_index(drop=True)
+    days = pd.to_datetime(df['criacaoInsert'])
+    connected = df['statusEquip'] == 'Conectado'
+    changed = df['statusEquip'].ne(df['statusEquip'].shift()) & df.index.to_series().gt(0)
+    # Dias entre o snapshot e o último tráfego registrado (nulo se nunca trafegou)
+    without_traffic = (days - pd.to_datetime(df['dataUltimoRegistro'], errors='coerce')).dt.days
+
+    frame = pd.DataFrame({'periodo': bucket_start(days, bucket), 'conectado': connected,
+                          'mudou': changed, 'sem_trafego': without_traffic, 'status': df['statusEquip']})
+    points = []
+    for period, group in frame.groupby('periodo', sort=True):
+        max_without_traffic = group['sem_trafego'].max()
+        points.append({
+            'inicio': period.date().isoformat(),
+            'dias': len(group),
+            'dias_conectado': int(group['conectado'].sum()),
+            'disponibilidade': _ratio(group['conectado'].sum(), len(group)),
+            'mudancas_status': int(group['mudou'].sum()),
+            'dias_sem_trafego_max': None if pd.isna(max_without_traffic) else int(max_without_traffic),
+            'status_final': _json_value(group['status'].iloc[-1]),
+        })
+
+    last = df.iloc[-1]
+    last_without_traffic = without_traffic.iloc[-1]
+    summary = {
+        'modeloEquip': _json_value(last['modeloEquip']),
+        'ipEquip': _json_value(last['ipEquip']),
+        'status_atual': _json_value(last['statusEquip']),
+        'primeiro_snapshot': days.iloc[0].date().isoformat(),
+        'ultimo_snapshot': days.iloc[-1].date().isoformat(),
+        'dias': len(df),
+        'disponibilidade': _ratio(connected.sum(), len(df)),
+        'mudancas_status': int(changed.sum()),
+        'dias_sem_trafego': None if pd.isna(last_without_traffic) else int(last_without_traffic),
     }
+    return {'resumo': summary, 'pontos': points}
 
-    total_today = fetch_data("""
-    SELECT COUNT(*) AS 'equipsMovimentacao'
-    FROM dados
-    WHERE dataUltimaConexao = %s
-    """, params=(actual_date,)).iloc[0]['equipsMovimentacao']
+############################################### PAGINAÇÃO DA TABELA DE DADOS
 
-    conectados_today = fetch_data("""
-    SELECT COUNT(*) AS 'equipsConectados'
-    FROM dados
-    WHERE statusEquip = 'Conectado' AND dataUltimaConexao = %s
-    """, params=(actual_date,)).iloc[0]['equipsConectados']
+DADOS_PAGE_SIZE = 100       # Linhas por página da tabela de dados
+DADOS_MAX_PAGE_SIZE = 1000  # Limite aceito no parâmetro 'limit' da API
 
-    desconectados_today = fetch_data("""
-    SELECT COUNT(*) AS 'equipsDesconectados'
-    FROM dados
-    WHERE statusEquip = 'Desconectado' AND dataUltimaConexao = %s 
-    """, params=(actual_date,)).iloc[0]['equipsDesconectados']
-
-    fig_today = px.pie(
-        df_today,
-        names='statusEquip',
-        title=f'Conectados x Desconectados em {formatted_actual_complete}',
-        color='statusEquip',
-        color_discrete_map=color_map_today,
-    )
+# Ordenações aceitas pela API; 'conexao' é a mesma do ORDER BY original da tabela.
+# idDado desempata as linhas para que o cursor aponte para uma posição única.
+# As colunas são ordenadas sem transformação para que os índices idx_dados_criacao_ordem
+# e idx_dados_criacao_registro entreguem a ordem e o intervalo de cada página.
+DADOS_SORTS = {
+    'conexao': ('dataUltimaConexao', 'horaUltimaconexao', 'dataUltimoRegistro'),
+    'registro': ('dataUltimoRegistro', 'dataUltimaConexao', 'horaUltimaconexao'),
+}
 
-    fig_today.update_traces(textfont_size=30)               # Ajusta o tamanho da fonte dos valores
-    fig_today.update_layout(title_font_size=22)             # Ajusta o tamanho da fonte do título
-    fig_today.update_layout(legend_title_font_size=12)      # Ajusta o tamanho da fonte da legenda
-    fig_today.update_layout(legend_font_size=12)            # Ajusta o tamanho da caixa da legenda
-    fig_today.update_layout(title_x=0.5)                    # Centraliza o título horizontalmente
-    fig_today.update_layout(
-        legend_title_font_size=12,  # Ajusta o tamanho do título da legenda
-        legend_font_size=12,        # Ajusta o tamanho do texto da legenda
-        legend_orientation="h",     # Muda a orientação da legenda para horizontal
-        legend_yanchor="top",       # Alinha a legenda ao topo da posição y
-        legend_y=-0.2,              # Ajuste a posição vertical da legenda para baixo
-        legend_x=0.5,               # Centraliza a legenda horizontalmente
-        legend_xanchor="center",    # Alinha a legenda ao centro da posição x
-    )
+def _sort_key_value(value):
+    """Converte um valor da chave de ordenação para texto aceito pelo MySQL (None se nulo)."""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, pd.Timedelta):
+        return (pd.Timestamp(0) + value).strftime('%H:%M:%S')
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()[:10]
+    return value
 
-    # Converter o gráfico para HTML
-    graph_html_today = pio.to_html(fig_today, full_html=False)
-    
-    ############################################### GERAÇÃO DE DADOS DE EQUIPAMENTOS QUE TRAFEGARAM
+def encode_cursor(state):
+    """Codifica a posição da página (ordenação, filtros e última chave) em um cursor opaco."""
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
 
-    # Consulta SQL para equipamentos que trafegaram hoje ou ontem
-    trafego_query = """
-    SELECT 
-        modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip, 
-        dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro
-    FROM dados
-    WHERE dataUltimoRegistro IN (%s, %s)
-    ORDER BY dataUltimaConexao DESC, horaUltimaConexao DESC, dataUltimoRegistro DESC
-    """ % (f"'{actual_date}'", f"'{previous_date}'")
+def _valid_cursor_state(state):
+    """Confere se o estado decodificado de um cursor tem todos os campos com tipos esperados."""
+    if not isinstance(state, dict) or state.get('sort') not in DADOS_SORTS or state.get('order') not in ('asc', 'desc'):
+        return False
+    if any(state.get(field) is not None and not isinstance(state[field], str) for field in ('status', 'modelo')):
+        return False
+    key = state.get('key')
+    if not isinstance(key, list) or len(key) != 4 or not isinstance(key[3], int):
+        return False
+    if any(value is not None and not isinstance(value, str) for value in key[:3]):
+        return False
+    try:
+        datetime.strptime(state.get('date') or '', '%Y-%m-%d')
+    except (ValueError, TypeError):
+        return False
+    return True
 
-    df_trafego = fetch_data(trafego_query)
-    
-    color_map_trafego = {
-        'Com Tráfego Recente': '#0f6636',
-        'Sem Tráfego Recente': '#dcdcdc'
-    }
-    
-    # Contar ttoal de equips
-    total_equips_trafego = fetch_data("""
-    SELECT COUNT(*) AS 'totalEquipamentos'
-    FROM dados
-    WHERE dataUltimaConexao = %s AND dataUltimoRegistro <= %s
-    """, params=(actual_date,actual_date,)).iloc[0]['totalEquipamentos']
-    
-    total_trafegaram_recente = fetch_data("""
-    SELECT COUNT(*) AS 'equipsTrafegaramRecente' 
-    FROM dados 
-    WHERE dataUltimaConexao = %s AND (dataUltimoRegistro = %s OR dataUltimoRegistro = %s)
-    """, params=(actual_date,actual_date, previous_date,)).iloc[0]['equipsTrafegaramRecente']
-
-    nao_trafegaram_recentemente = total_equips_trafego - total_trafegaram_recente
-
-    # Criar o gráfico
-    fig_travel = px.pie(
-        df_trafego,
-        names=['Com Tráfego Recente', 'Sem Tráfego Recente'],
-        values=[total_trafegaram_recente, nao_trafegaram_recentemente],
-        title=f'Tráfego de Equipamentos em {formatted_actual_complete}',
-        color=['Com Tráfego Recente', 'Sem Tráfego Recente'],
-        color_discrete_map=color_map_trafego,  # Usando color_map_trafego aqui
-    )
+def decode_cursor(cursor):
+    """Decodifica um cursor gerado por encode_cursor; lança ValueError se for inválido."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("cursor inválido")
+    if not _valid_cursor_state(state):
+        raise ValueError("cursor inválido")
+    return state
 
-    # Atualizar o gráfico
-    fig_travel.update_traces(textfont_size=30)              # Ajusta o tamanho da fonte dos valores 
-    fig_travel.update_layout(title_font_size=22)            # Ajusta o tamanho da fonte do título
-    fig_travel.update_layout(legend_title_font_size=12)     # Ajusta o tamanho da fonte da legenda
-    fig_travel.update_layout(legend_font_size=12)           # Ajusta o tamanho da caixa da legenda
-    fig_travel.update_layout(title_x=0.5)                   # Centraliza o título horizontalmente
-    fig_travel.update_layout(
-        legend_title_font_size=12,  # Ajusta o tamanho do título da legenda
-        legend_font_size=12,        # Ajusta o tamanho do texto da legenda
-        legend_orientation="h",     # Muda a orientação da legenda para horizontal
-        legend_yanchor="top",       # Alinha a legenda ao topo da posição y
-        legend_y=-0.2,              # Ajuste a posição vertical da legenda para baixo
-        legend_x=0.5,               # Centraliza a legenda horizontalmente
-        legend_xanchor="center",    # Alinha a legenda ao centro da posição x
-    )
-    graph_html_travel = pio.to_html(fig_travel, full_html=False)
-
-    data_html = generate_data_html(df, actual_date)
-
-    return render_template('index.html',
-                           graph_html_all=graph_html_all,
-                           graph_html_today=graph_html_today,
-                           graph_html_travel=graph_html_travel,
-                           data_html=data_html,
-                           total_equipamentos=total_equipamentos,
-                           conectados=conectados,
-                           desconectados=desconectados,
-                           total_today=total_today,
-                           conectados_today=conectados_today,
-                           desconectados_today=desconectados_today,
-                           total_equips_trafego=total_equips_trafego,
-                           total_trafegaram_recente=total_trafegaram_recente,
-                           nao_trafegaram_recentemente=nao_trafegaram_recentemente,
-                           formatted_actual_day_month=formatted_actual_day_month,
-                           formatted_previous_day_month=formatted_previous_day_month,
-                           formatted_actual_complete=formatted_actual_complete)
+def keyset_condition(columns, key, direction):
+    """Monta a condição "depois da chave" para (columns..., idDado) e seus parâmetros.
 
-@app.route('/update_date', methods=['POST'])
-def update_date():
-    selected_date = request.form.get('date')
-    return redirect(url_for('index', selected_date=selected_date))
+    Segue a ordem do MySQL, em que NULL vem antes de qualquer valor. A comparação é
+    expandida coluna a coluna (com 'coluna IS NULL' explícito) em vez de usar uma tupla,
+    que não compara NULL, e cada termo vira um intervalo do índice.
+    """
+    *values, last_id = key
+    condition = f"idDado {'>' if direction == 'ASC' else '<'} %s"
+    params = [last_id]
+    for column, value in reversed(list(zip(columns, values))):
+        if value is None:
+            # Nada vem antes de NULL; na ordem crescente, qualquer valor vem depois
+            after, after_params = (f"{column} IS NOT NULL", []) if direction == 'ASC' else (None, [])
+            equal, equal_params = f"{column} IS NULL", []
+        else:
+            if direction == 'ASC':
+                after = f"{column} > %s"
+            else:
+                after = f"({column} < %s OR {column} IS NULL)"
+            after_params = [value]
+            equal, equal_params = f"{column} = %s", [value]
+        nested = f"({equal} AND {condition})"
+        if after:
+            condition, params = f"({after} OR {nested})", after_params + equal_params + params
+        else:
+            condition, params = nested, equal_params + params
+    return condition, params
 
+def dados_page_query(state, limit):
+    """Monta a consulta (e os parâmetros) de uma página de dados a partir do estado do cursor."""
+    columns = DADOS_SORTS[state['sort']]
+    direction = 'ASC' if state['order'] == 'asc' else 'DESC'
 
-@app.route('/dashboard-mensal')
-def dashboard_mensal():
-    # Obter o mês e ano a partir dos parâmetros da URL
-    selected_month = request.args.get('month', default=pd.Timestamp.now().strftime('%Y-%m'), type=str)
-    
-    # Converter o mês selecionado para ano e mês
-    year, month = map(int, selected_month.split('-'))
+    conditions = ["criacaoInsert = %s"]
+    params = [state['date']]
+    if state.get('status'):
+        conditions.append("statusEquip = %s")
+        params.append(state['status'])
+    if state.get('modelo'):
+        conditions.append("modeloEquip = %s")
+        params.append(state['modelo'])
+    if state.get('key'):
+        condition, key_params = keyset_condition(columns, state['key'], direction)
+        conditions.append(condition)
+        params.extend(key_params)
 
-    # Consultas SQL para os dados diários do mês selecionado
-    geral_query = """
-    SELECT modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip, dataUltimaConexao, horaUltimaconexao, dataUltimoRegistro
-    FROM dados
-    WHERE criacaoInsert = CURDATE()
-    ORDER BY dataUltimaConexao DESC, horaUltimaconexao DESC, dataUltimoRegistro DESC
-    """
-    df = fetch_data(geral_query)
-    
-    
-    movimentacao_query = """
-    SELECT DATE(criacaoInsert) AS day, COUNT(*) AS equipsMovimentacao
-    FROM dados
-    WHERE YEAR(criacaoInsert) = %s AND MONTH(criacaoInsert) = %s
-    GROUP BY day
-    ORDER BY day
-    """
-    
-    conectados_query = """
-    SELECT DATE(criacaoInsert) AS day, COUNT(*) AS equipsConectados
-    FROM dados
-    WHERE statusEquip = 'Conectado' AND YEAR(criacaoInsert) = %s AND MONTH(criacaoInsert) = %s
-    GROUP BY day
-    ORDER BY day
-    """
-    
-    desconectados_query = """
-    SELECT DATE(criacaoInsert) AS day, COUNT(*) AS equipsDesconectados
+    # Os alertas descrevem o estado atual, então só marcam as linhas do dia atual
+    # (busca pela chave primária de equipamentos_alertas, só para as linhas da página)
+    if state['date'] == datetime.now().date().isoformat():
+        alerts = "(SELECT GROUP_CONCAT(tipo) FROM equipamentos_alertas a WHERE a.numSerieEquip = dados.numSerieEquip)"
+    else:
+        alerts = "NULL"
+
+    order_by = ', '.join(f"{column} {direction}" for column in columns + ('idDado',))
+    query = f"""
+    SELECT idDado, modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip, dataUltimaConexao, horaUltimaconexao, dataUltimoRegistro,
+        {alerts} AS alertas
     FROM dados
-    WHERE statusEquip = 'Desconectado' AND YEAR(criacaoInsert) = %s AND MONTH(criacaoInsert) = %s
-    GROUP BY day
-    ORDER BY day
+    WHERE {' AND '.join(conditions)}
+    ORDER BY {order_by}
+    LIMIT {int(limit) + 1}
     """
-    
-    media_cadastrados_query = """
-    SELECT FLOOR(AVG(equipsMovimentacao)) AS mediaEquipsMovimentacao
-    FROM (
-        SELECT criacaoInsert, COUNT(*) AS equipsMovimentacao
-        FROM dados
-        GROUP BY criacaoInsert
-    ) AS mediaMovimentacao
-    WHERE YEAR(criacaoInsert) = %s AND MONTH(criacaoInsert) = %s
+    return query, tuple(params)
+
+def fetch_dados_page(state, limit=DADOS_PAGE_SIZE):
+    """Busca uma página da tabela de dados e retorna (DataFrame, cursor da próxima página ou None)."""
+    query, params = dados_page_query(state, limit)
+    df = fetch_data(query, params=params, name='dados_pagina')
+
+    next_cursor = None
+    if len(df) > limit:
+        # A linha extra só indica que existe uma próxima página
+        df = df.iloc[:limit]
+        last = df.iloc[-1]
+        key = [_sort_key_value(last[column]) for column in DADOS_SORTS[state['sort']]]
+        key.append(int(last['idDado']))
+        next_cursor = encode_cursor(dict(state, key=key))
+    return df, next_cursor
+
+def dados_page_state(selected_date, sort='conexao', order='desc', status=None, modelo=None):
+    """Estado inicial (primeira página) da paginação da tabela de dados."""
+    return {
+        'date': selected_date.isoformat(),
+        'sort': sort,
+        'order': order,
+        'status': status,
+        'modelo': modelo,
+        'key': None,
+    }
+
+def _json_value(value):
+    """Converte valores vindos do banco/pandas para tipos serializáveis em JSON."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timedelta):
+        return (pd.Timestamp(0) + value).strftime('%H:%M:%S')
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()[:10]
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def _alert_lists(column):
+    """Converte a coluna alertas da página ('tipo1,tipo2' ou NULL) em listas de tipos."""
+    return [value.split(',') if isinstance(value, str) and value else [] for value in column.tolist()]
+
+def dados_rows_json(df, actual_date):
+    """Converte uma página de dados em uma lista de dicionários para a API."""
+    columns = ['modeloEquip', 'numSerieEquip', 'ipEquip', 'portaEquip', 'statusEquip',
+               'dataUltimaConexao', 'horaUltimaconexao', 'dataUltimoRegistro']
+    alerts = _alert_lists(df['alertas']) if 'alertas' in df else None
+    rows = []
+    for record in df[columns].to_dict('records') if not df.empty else []:
+        row = {column: _json_value(value) for column, value in record.items()}
+        # Mesmo destaque da tabela HTML: última conexão diferente da data consultada
+        row['destaque'] = row['dataUltimaConexao'] != actual_date.isoformat()
+        if alerts is not None:
+            row['alertas'] = alerts[len(rows)]
+        rows.append(row)
+    return rows
+
+############################################### EXPORTAÇÃO DE SNAPSHOTS
+
+EXPORT_CHUNK_SIZE = 5000    # Linhas lidas do banco (e gravadas) por vez
+
+# Consultas do dashboard diário que podem ser exportadas
+EXPORT_QUERIES = {
+    'geral': GERAL_QUERY,           # Snapshot gravado no dia
+    'dia_atual': DIA_ATUAL_QUERY,   # Equipamentos que conectaram no dia
+}
+
+EXPORT_COLUMNS = ['data', 'modeloEquip', 'numSerieEquip', 'ipEquip', 'portaEquip', 'statusEquip',
+                  'dataUltimaConexao', 'horaUltimaconexao', 'dataUltimoRegistro']
+
+def export_days(selected_date=None, selected_month=None):
+    """Lista os dias a exportar: a data informada ou todos os dias do mês.
+
+    Lança ValueError se a data (AAAA-MM-DD) ou o mês (AAAA-MM) forem inválidos.
     """
-    
-    media_conectados_query = """
-    SELECT FLOOR(AVG(equipsConectados)) AS mediaEquipsConectados
-    FROM (
-        SELECT criacaoInsert, COUNT(*) AS equipsConectados
-        FROM dados
-        WHERE statusEquip = 'Conectado'
-        GROUP BY criacaoInsert
-    ) AS mediaConectados
-    WHERE YEAR(criacaoInsert) = %s AND MONTH(criacaoInsert) = %s
+    if selected_month:
+        try:
+            month = datetime.strptime(selected_month, '%Y-%m')
+        except ValueError:
+            raise ValueError("mês inválido: use month=AAAA-MM")
+        start, end = month_range(month.year, month.month)
+        return [start + timedelta(days=i) for i in range((end - start).days)]
+    try:
+        return [datetime.strptime(selected_date, '%Y-%m-%d').date()]
+    except (ValueError, TypeError):
+        raise ValueError("data inválida: use date=AAAA-MM-DD")
+
+def iter_export_rows(days, kind='geral', chunk_size=EXPORT_CHUNK_SIZE):
+    """Gera blocos de linhas lidos do banco com cursor não bufferizado, um dia de cada vez.
+
+    Cada linha recebe a data consultada na primeira coluna. Nada é acumulado em memória
+    além do bloco atual. Erros do banco são relançados para interromper a resposta (ou o
+    arquivo), em vez de entregar uma exportação incompleta como se estivesse completa.
     """
-    
-    media_desconectados_query = """
-    SELECT FLOOR(AVG(equipsDesconectados)) AS mediaEquipsDesconectados
-    FROM (
-        SELECT criacaoInsert, COUNT(*) AS equipsDesconectados
-        FROM dados
-        WHERE statusEquip = 'Desconectado'
-        GROUP BY criacaoInsert
-    ) AS mediaDesconectados
-    WHERE YEAR(criacaoInsert) = %s AND MONTH(criacaoInsert) = %s
+    query = EXPORT_QUERIES[kind]
+    with pooled_connection() as connection:
+        if not connection:
+            raise Error("sem conexão com o banco de dados")
+        cursor = connection.cursor(buffered=False)
+        try:
+            for day in days:
+                # Todos os parâmetros das consultas de exportação são a data consultada
+                cursor.execute(query, (day,) * query.count('%s'))
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield [(day,) + tuple(row) for row in rows]
+        except Error as e:
+            print(f"Erro ao executar consulta: {e}")
+            raise
+        finally:
+            cursor.close()
+
+def _export_value(value):
+    """Formata um valor do banco para o CSV (TIME do MySQL chega como timedelta)."""
+    if value is None:
+        return ''
+    if isinstance(value, timedelta):
+        return str(value)
+    return value
+
+def iter_csv(chunks):
+    """Converte os blocos de linhas em pedaços de texto CSV."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_export_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+
+class _ChunkSink(io.RawIOBase):
+    """Arquivo só de escrita que acumula os bytes gravados até serem retirados com drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def iter_parquet(chunks):
+    """Converte os blocos de linhas em pedaços de um arquivo Parquet (um row group por bloco)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('data', pa.date32()),
+        ('modeloEquip', pa.string()),
+        ('numSerieEquip', pa.string()),
+        ('ipEquip', pa.string()),
+        ('portaEquip', pa.int32()),
+        ('statusEquip', pa.string()),
+        ('dataUltimaConexao', pa.date32()),
+        ('horaUltimaconexao', pa.time32('s')),
+        ('dataUltimoRegistro', pa.date32()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            # TIME do MySQL chega como timedelta; o Parquet guarda como hora do dia
+            columns[7] = [None if value is None else (datetime.min + value).time() for value in columns[7]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'parquet': (iter_parquet, 'application/vnd.apache.parquet'),
+}
+
+def export_parquet_available():
+    """Indica se o pyarrow (necessário para exportar em Parquet) está instalado."""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+############################################### INGESTÃO DE SNAPSHOTS
+
+INGEST_MAX_DEVICES = 10000  # Equipamentos aceitos por chamada de /api/ingestao
+
+# Campos de cada equipamento, na ordem do INSERT
+INGEST_COLUMNS = ['modeloEquip', 'numSerieEquip', 'ipEquip', 'portaEquip', 'statusEquip',
+                  'dataUltimaConexao', 'horaUltimaConexao', 'dataUltimoRegistro']
+
+INGEST_STATUS = ('Conectado', 'Desconectado')
+
+INGEST_INSERT_QUERY = """
+INSERT INTO dados (criacaoInsert, modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip,
+                   dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def _ingest_value(device, column, parse):
+    """Lê e valida um campo opcional do equipamento; vazio vira NULL."""
+    value = device.get(column)
+    if value is None or value == '':
+        return None
+    try:
+        return parse(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{column} inválido: {value!r}")
+
+def normalize_device(device):
+    """Valida um equipamento recebido na ingestão e retorna a tupla na ordem de INGEST_COLUMNS."""
+    if not isinstance(device, dict):
+        raise ValueError("cada equipamento deve ser um objeto com os campos de INGEST_COLUMNS")
+    serial = _ingest_value(device, 'numSerieEquip', lambda value: str(value).strip())
+    if not serial:
+        raise ValueError("numSerieEquip é obrigatório")
+    status = device.get('statusEquip')
+    if status not in INGEST_STATUS:
+        raise ValueError(f"statusEquip inválido para {serial}: use {' ou '.join(INGEST_STATUS)}")
+
+    parse_date = lambda value: datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    parse_time = lambda value: datetime.strptime(str(value), '%H:%M:%S').time()
+    return (
+        _ingest_value(device, 'modeloEquip', str),
+        serial,
+        _ingest_value(device, 'ipEquip', str),
+        _ingest_value(device, 'portaEquip', int),
+        status,
+        _ingest_value(device, 'dataUltimaConexao', parse_date),
+        _ingest_value(device, 'horaUltimaConexao', parse_time),
+        _ingest_value(device, 'dataUltimoRegistro', parse_date),
+    )
+
+def ingest_snapshot(connection, snapshot_date, devices, batch_size=None):
+    """Grava o status de um lote de equipamentos no snapshot do dia, em uma transação.
+
+    Equipamentos que já tinham linha no snapshot do dia são substituídos, então reenviar
+    um lote não duplica linhas. O rollup diário e equipamentos_estado_atual são mantidos
+    pelos triggers de dados. Retorna a quantidade de equipamentos gravados.
     """
+    batch_size = batch_size or ingest_config['batch_size']
+    # Se o mesmo equipamento vier mais de uma vez no lote, vale a última
+    rows = list({row[1]: row for row in (normalize_device(device) for device in devices)}.values())
 
-    # Buscar dados
-    df_movimentacao = fetch_data(movimentacao_query, params=(year, month))
-    df_conectados = fetch_data(conectados_query, params=(year, month))
-    df_desconectados = fetch_data(desconectados_query, params=(year, month))
-    
-    # Consultar as médias
-    media_cadastrados_df = fetch_data(media_cadastrados_query, params=(year, month))
-    media_cadastrados = media_cadastrados_df.iloc[0]['mediaEquipsMovimentacao']
-    
-    media_conectados_df = fetch_data(media_conectados_query, params=(year, month))
-    media_conectados = media_conectados_df.iloc[0]['mediaEquipsConectados']
-    
-    media_desconectados_df = fetch_data(media_desconectados_query, params=(year, month))
-    media_desconectados = media_desconectados_df.iloc[0]['mediaEquipsDesconectados']
-    
+    cursor = connection.cursor()
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            serials = [row[1] for row in batch]
+            cursor.execute(
+                f"DELETE FROM dados WHERE criacaoInsert = %s AND numSerieEquip IN ({', '.join(['%s'] * len(serials))})",
+                (snapshot_date, *serials),
+            )
+            # O mysql.connector envia o executemany de um INSERT como um único INSERT de várias linhas
+            cursor.executemany(INGEST_INSERT_QUERY, [(snapshot_date, *row) for row in batch])
+        connection.commit()
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return len(rows)
 
-    
-    # Preparar os dados para o gráfico
-    df_combined = pd.merge(df_movimentacao, df_conectados, on='day', how='left', suffixes=('_total', '_conectados'))
-    df_combined = pd.merge(df_combined, df_desconectados, on='day', how='left')
-    df_combined.rename(columns={'day': 'Data', 'equipsMovimentacao': 'Cadastrados', 'equipsConectados': 'Conectados', 'equipsDesconectados': 'Desconectados'}, inplace=True)
-    
-    color_map_mensal = {
-    # 'Cadastrados': '#808080',
+def read_ingest_file(path):
+    """Lê os equipamentos de um arquivo CSV (cabeçalho com INGEST_COLUMNS) ou JSON (lista ou {'equipamentos': [...]})."""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        yield from (data.get('equipamentos', []) if isinstance(data, dict) else data)
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+def ingest_token_valid(token):
+    """Confere o token da ingestão (nunca válido se nenhum token foi configurado)."""
+    expected = ingest_config['token']
+    return bool(expected) and hmac.compare_digest((token or '').encode('utf-8'), expected.encode('utf-8'))
+
+def ingest_auth_error():
+    """Resposta de erro se a requisição não traz o token de ingestão (X-Ingest-Token), ou None.
+
+    Sem token configurado as rotas que alteram dados ou o cache ficam desativadas (403).
+    """
+    if not ingest_config['token']:
+        return jsonify({'erro': 'rota desativada: configure DASHBOARD_INGEST_TOKEN'}), 403
+    if not ingest_token_valid(request.headers.get('X-Ingest-Token')):
+        return jsonify({'erro': 'token de ingestão inválido'}), 401
+    return None
+
+############################################### ALERTAS DE EQUIPAMENTOS
+
+# Equipamentos com problema no snapshot mais recente, calculados pelo comando
+# detect-alerts (agendado) e gravados em equipamentos_alertas, para que os dashboards
+# e /api/alertas não precisem percorrer o histórico a cada requisição:
+# - sem_trafego: conectado, mas sem registros há alert_config['silent_days'] dias ou mais
+# - conexao_atrasada: consta como conectado, mas a última conexão foi há
+#   alert_config['drift_hours'] horas ou mais
+ALERTA_TIPOS = ('sem_trafego', 'conexao_atrasada')
+
+ALERTAS_PAGE_SIZE = 100         # Alertas por resposta de /api/alertas
+ALERTAS_MAX_PAGE_SIZE = 1000    # Limite aceito no parâmetro 'limit'
+
+# Estado de cada equipamento no snapshot mais recente (usa idx_estado_atualizado)
+ALERTAS_ESTADO_QUERY = """
+SELECT numSerieEquip, modeloEquip, statusEquip, dataUltimaConexao, horaUltimaConexao AS horaUltimaconexao, dataUltimoRegistro, atualizadoEm
+FROM equipamentos_estado_atual
+WHERE atualizadoEm = (SELECT MAX(atualizadoEm) FROM equipamentos_estado_atual)
+"""
+
+ALERTAS_COLUMNS = ['numSerieEquip', 'tipo', 'modeloEquip', 'diasSemTrafego', 'horasSemConexao',
+                   'dataUltimaConexao', 'horaUltimaConexao', 'dataUltimoRegistro']
+
+# detectadoEm é preservado enquanto o problema continuar; atualizadoEm marca a execução
+ALERTAS_UPSERT_QUERY = """
+INSERT INTO equipamentos_alertas (numSerieEquip, tipo, modeloEquip, diasSemTrafego, horasSemConexao,
+                                  dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro, detectadoEm, atualizadoEm)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    modeloEquip = VALUES(modeloEquip),
+    diasSemTrafego = VALUES(diasSemTrafego),
+    horasSemConexao = VALUES(horasSemConexao),
+    dataUltimaConexao = VALUES(dataUltimaConexao),
+    horaUltimaConexao = VALUES(horaUltimaConexao),
+    dataUltimoRegistro = VALUES(dataUltimoRegistro),
+    atualizadoEm = VALUES(atualizadoEm)
+"""
+
+ALERTAS_RESUMO_QUERY = """
+SELECT tipo, COUNT(*) AS total, MAX(atualizadoEm) AS atualizadoEm
+FROM equipamentos_alertas
+GROUP BY tipo
+"""
+
+def detect_alerts(df, reference=None, silent_days=None, drift_hours=None):
+    """Calcula os alertas de todos os equipamentos de uma vez (ALERTAS_ESTADO_QUERY).
+
+    `reference` é o momento da análise (padrão: agora); para snapshots de dias passados
+    vale o fim do dia do snapshot. Retorna um DataFrame com ALERTAS_COLUMNS, uma linha
+    por equipamento e tipo de alerta.
+    """
+    silent_days = alert_config['silent_days'] if silent_days is None else silent_days
+    drift_hours = alert_config['drift_hours'] if drift_hours is None else drift_hours
+    if df.empty:
+        return pd.DataFrame(columns=ALERTAS_COLUMNS)
+
+    snapshot_date = pd.to_datetime(df['atualizadoEm']).max()
+    reference = min(pd.Timestamp(reference or datetime.now()), snapshot_date + pd.Timedelta(days=1))
+
+    connected = df['statusEquip'] == 'Conectado'
+    silent_days_count = (snapshot_date - pd.to_datetime(df['dataUltimoRegistro'], errors='coerce')).dt.days
+    connection_time = pd.to_timedelta(df['horaUltimaconexao'], errors='coerce').fillna(pd.Timedelta(0))
+    last_connection = pd.to_datetime(df['dataUltimaConexao'], errors='coerce') + connection_time
+    hours_count = ((reference - last_connection) // pd.Timedelta(hours=1)).clip(lower=0)
+
+    # Sem data de registro/conexão conta como alerta: o equipamento nunca informou
+    flags = {
+        'sem_trafego': connected & (silent_days_count.isna() | (silent_days_count >= silent_days)),
+        'conexao_atrasada': connected & (hours_count.isna() | (hours_count >= drift_hours)),
+    }
+
+    base = pd.DataFrame({
+        'numSerieEquip': df['numSerieEquip'],
+        'modeloEquip': df['modeloEquip'],
+        'diasSemTrafego': silent_days_count.astype('Int64'),
+        'horasSemConexao': hours_count.astype('Int64'),
+        'dataUltimaConexao': df['dataUltimaConexao'],
+        'horaUltimaConexao': df['horaUltimaconexao'],
+        'dataUltimoRegistro': df['dataUltimoRegistro'],
+    })
+    alerts = [base[mask].assign(tipo=tipo) for tipo, mask in flags.items()]
+    return pd.concat(alerts, ignore_index=True)[ALERTAS_COLUMNS]
+
+def _alert_value(value):
+    """Converte um valor do DataFrame de alertas para gravação no MySQL."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timedelta):
+        return (pd.Timestamp(0) + value).strftime('%H:%M:%S')
+    if isinstance(value, pd.Timestamp):
+        return value.date()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def store_alerts(connection, alerts, run_at, batch_size=None):
+    """Grava os alertas calculados e remove os que deixaram de ocorrer, em uma transação.
+
+    Retorna (alertas gravados, alertas resolvidos).
+    """
+    batch_size = batch_size or ingest_config['batch_size']
+    rows = [tuple(_alert_value(value) for value in record) + (run_at, run_at)
+            for record in alerts[ALERTAS_COLUMNS].itertuples(index=False, name=None)]
+
+    cursor = connection.cursor()
+    try:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(ALERTAS_UPSERT_QUERY, rows[start:start + batch_size])
+        cursor.execute("DELETE FROM equipamentos_alertas WHERE atualizadoEm <> %s", (run_at,))
+        resolved = cursor.rowcount
+        connection.commit()
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return len(rows), resolved
+
+def alerts_query(tipo=None, modelo=None, dias_min=None, horas_min=None, limit=ALERTAS_PAGE_SIZE):
+    """Monta a consulta (e os parâmetros) de /api/alertas, do alerta mais grave para o menos grave
+    (equipamentos que nunca informaram registro ou conexão primeiro)."""
+    conditions = []
+    params = []
+    if tipo:
+        conditions.append("tipo = %s")
+        params.append(tipo)
+    if modelo:
+        conditions.append("modeloEquip = %s")
+        params.append(modelo)
+    if dias_min is not None:
+        conditions.append("diasSemTrafego >= %s")
+        params.append(dias_min)
+    if horas_min is not None:
+        conditions.append("horasSemConexao >= %s")
+        params.append(horas_min)
+
+    query = f"""
+    SELECT numSerieEquip, tipo, modeloEquip, diasSemTrafego, horasSemConexao, dataUltimaConexao,
+        horaUltimaConexao AS horaUltimaconexao, dataUltimoRegistro, detectadoEm
+    FROM equipamentos_alertas
+    {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+    ORDER BY diasSemTrafego IS NULL DESC, diasSemTrafego DESC, horasSemConexao IS NULL DESC, horasSemConexao DESC, numSerieEquip
+    LIMIT {int(limit)}
+    """
+    return query, tuple(params)
+
+############################################### GRÁFICOS
+
+# Os gráficos são enviados ao navegador como especificações compactas (só dados, título e
+# cores). O layout comum de cada tipo de gráfico fica em static/js/graficos.js.
+
+CORES_STATUS = {
+    'Conectado': '#0f6636',
+    'Desconectado': '#dcdcdc'
+}
+
+CORES_TRAFEGO = {
+    'Com Tráfego Recente': '#0f6636',
+    'Sem Tráfego Recente': '#dcdcdc'
+}
+
+CORES_MENSAL = {
     'Cadastrados': '#2180de',
     'Conectados': '#1bb15e',
     'Desconectados': '#de2121'
-    }  
-
-    # Criar o gráfico linear
-    fig = px.line(
-        df_combined,
-        x='Data',
-        y=['Cadastrados', 'Conectados', 'Desconectados'],
-        labels={'value': 'Quantidade', 'Data': 'Data'},
-        title='Movimentação de Equipamentos por Dia',
-        markers=True,
-        color_discrete_map=color_map_mensal,
+}
+
+def pie_chart(title, values, color_map):
+    """Gráfico de pizza a partir de {rótulo: valor}."""
+    labels = list(values)
+    return {
+        'tipo': 'pizza',
+        'data': [{
+            'labels': labels,
+            'values': [values[label] for label in labels],
+            'marker': {'colors': [color_map[label] for label in labels]},
+        }],
+        'layout': {'title': {'text': title}},
+    }
+
+def line_chart(title, x, series, color_map):
+    """Gráfico de linhas com um traço por série de {nome: valores}."""
+    return {
+        'tipo': 'linha',
+        'data': [{
+            'name': name,
+            'x': x,
+            'y': values,
+            'line': {'color': color_map[name]},
+            'marker': {'color': color_map[name]},
+        } for name, values in series.items()],
+        'layout': {'title': {'text': title}},
+    }
+
+def daily_charts(actual_date, counters):
+    """Gráficos do dashboard diário a partir dos totalizadores do dia."""
+    formatted_actual_complete = actual_date.strftime('%d/%m/%Y')
+    return {
+        'geral': pie_chart('Geral - Conectados x Desconectados', {
+            'Conectado': counters['conectados'],
+            'Desconectado': counters['desconectados'],
+        }, CORES_STATUS),
+        'dia': pie_chart(f'Conectados x Desconectados em {formatted_actual_complete}', {
+            'Conectado': counters['conectados_today'],
+            'Desconectado': counters['desconectados_today'],
+        }, CORES_STATUS),
+        'trafego': pie_chart(f'Tráfego de Equipamentos em {formatted_actual_complete}', {
+            'Com Tráfego Recente': counters['total_trafegaram_recente'],
+            'Sem Tráfego Recente': counters['total_equips_trafego'] - counters['total_trafegaram_recente'],
+        }, CORES_TRAFEGO),
+    }
+
+def monthly_charts(df_rollup):
+    """Gráfico de movimentação diária do dashboard mensal a partir do rollup."""
+    if df_rollup.empty:
+        x, series = [], {name: [] for name in CORES_MENSAL}
+    else:
+        x = pd.to_datetime(df_rollup['day']).dt.strftime('%Y-%m-%d').tolist()
+        series = {
+            'Cadastrados': df_rollup['equipsMovimentacao'].tolist(),
+            'Conectados': df_rollup['equipsConectados'].tolist(),
+            'Desconectados': df_rollup['equipsDesconectados'].tolist(),
+        }
+    return {
+        'mensal': line_chart('Movimentação de Equipamentos por Dia', x, series, CORES_MENSAL),
+    }
+
+############################################### STATUS AO VIVO
+
+# Colunas comparadas entre uma consulta e outra para saber se a linha do equipamento mudou
+LIVE_COLUMNS = ['modeloEquip', 'ipEquip', 'portaEquip', 'statusEquip',
+                'dataUltimaConexao', 'horaUltimaconexao', 'dataUltimoRegistro']
+
+def _live_snapshot(df):
+    """Linhas da consulta como texto, indexadas por numSerieEquip, para comparar com a consulta anterior."""
+    if df.empty:
+        return pd.DataFrame(columns=LIVE_COLUMNS)
+    snapshot = df.drop_duplicates('numSerieEquip', keep='last').set_index('numSerieEquip')[LIVE_COLUMNS].copy()
+    # Mesmo texto para a porta entre uma consulta e outra, mesmo que venha sem schema (float com nulos)
+    snapshot['portaEquip'] = pd.to_numeric(snapshot['portaEquip'], errors='coerce').astype('Int64')
+    return snapshot.astype(str)
+
+def live_counters(counters):
+    """Totalizadores exibidos no dashboard diário, incluindo os que são derivados dos demais."""
+    return dict(counters, nao_trafegaram_recentemente=counters['total_equips_trafego'] - counters['total_trafegaram_recente'])
+
+class StatusBroadcaster:
+    """Consulta o estado atual dos equipamentos em segundo plano e distribui as mudanças.
+
+    Uma única thread consulta o banco a cada `interval` segundos, enquanto houver alguém
+    conectado, e calcula uma vez as diferenças (totalizadores e linhas por numSerieEquip)
+    em relação à consulta anterior. Cada mudança vira uma nova versão; os clientes
+    informam a última versão que receberam e recebem só o que mudou desde ela.
+
+    O histórico de versões é deste processo: o identificador enviado aos clientes
+    ('época.versão', ver version_id) leva uma época sorteada por instância, e versões de
+    outro processo (outro worker, ou antes de um reinício) recebem o estado completo.
+    """
+
+    def __init__(self, interval=15, history=240, keepalive=25):
+        self.interval = interval
+        self.keepalive = keepalive
+        self._history = deque(maxlen=history)   # {version, date, counters, rows, removed} por versão
+        self._condition = threading.Condition()
+        self._subscribers = 0
+        self._thread = None
+        self._snapshot = None                   # Linhas da última consulta, indexadas por numSerieEquip
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+
+    def version_id(self, version=None):
+        """Identificador de uma versão (padrão: a atual) enviado aos clientes."""
+        return f"{self.epoch}.{self.version if version is None else version}"
+
+    def _local_version(self, version_id):
+        """Número da versão recebida do cliente, ou None se ela for de outro processo ou inválida."""
+        epoch, _, number = (version_id or '').partition('.')
+        return int(number) if epoch == self.epoch and number.isdigit() else None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='status-ao-vivo', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._subscribers > 0)
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Erro ao atualizar o status ao vivo: {e}")
+            time.sleep(self.interval)
+
+    def poll(self):
+        """Consulta o estado atual e registra uma nova versão se algo mudou."""
+        actual_date = datetime.now().date()
+        df, _, db_error = run_tracked(fetch_data, ESTADO_GERAL_QUERY, params=(actual_date,), name='status_ao_vivo')
+        if db_error:
+            # Com o banco fora do ar, os clientes continuam com a última versão
+            return
+
+        # Os que conectaram no dia são um subconjunto do snapshot do dia (mesmo filtro de ESTADO_RESUMO_DIA_QUERY)
+        connection_dates = pd.to_datetime(df.get('dataUltimaConexao', pd.Series(dtype=object)), errors='coerce')
+        df_today = df[connection_dates.dt.normalize() == pd.Timestamp(actual_date)]
+        counters = live_counters(daily_counters(df, df_today, actual_date, actual_date - timedelta(days=1)))
+
+        snapshot = _live_snapshot(df)
+        rows, removed = {}, []
+        previous = self._snapshot
+        last = self._history[-1] if self._history else None
+        if previous is not None and last is not None and last['date'] == actual_date:
+            common = snapshot.index.intersection(previous.index)
+            changed = common[(snapshot.loc[common] != previous.loc[common]).any(axis=1)]
+            changed = changed.union(snapshot.index.difference(previous.index))
+            removed = [str(serial) for serial in previous.index.difference(snapshot.index)]
+            changed_df = df[df['numSerieEquip'].isin(changed)].drop_duplicates('numSerieEquip', keep='last')
+            rows = {row['numSerieEquip']: row for row in dados_rows_json(changed_df, actual_date)}
+            if not rows and not removed and counters == last['counters']:
+                return
+
+        with self._condition:
+            self._snapshot = snapshot
+            self.version += 1
+            self._history.append({'version': self.version, 'date': actual_date, 'counters': counters,
+                                  'rows': rows, 'removed': removed})
+            self._condition.notify_all()
+
+    def changes_since(self, version_id):
+        """Retorna o evento com o que mudou desde `version_id`, ou None se não há versão mais nova.
+
+        Versões que não estão mais no histórico (de outro dia ou de outro processo) recebem o
+        estado completo dos totalizadores com `completo: true`, para o cliente recarregar a tabela.
+        """
+        version = self._local_version(version_id)
+        with self._condition:
+            if not self._history or version == self.version:
+                return None
+            history = list(self._history)
+        current = history[-1]
+        base = next((entry for entry in history if entry['version'] == version), None)
+        event = {'version': self.version_id(current['version']), 'date': current['date'].isoformat()}
+
+        if base is None or base['date'] != current['date']:
+            event.update(completo=True, contadores=current['counters'], linhas=[], removidos=[])
+        else:
+            rows, removed = {}, set()
+            for entry in history:
+                if entry['version'] <= version:
+                    continue
+                for serial in entry['removed']:
+                    rows.pop(serial, None)
+                    removed.add(serial)
+                for serial, row in entry['rows'].items():
+                    removed.discard(serial)
+                    rows[serial] = row
+            counters = {name: value for name, value in current['counters'].items()
+                        if base['counters'].get(name) != value}
+            event.update(completo=False, contadores=counters, linhas=list(rows.values()), removidos=sorted(removed))
+
+        if event['contadores']:
+            event['graficos'] = daily_charts(current['date'], current['counters'])
+        return event
+
+    def wait_for_changes(self, version_id, timeout):
+        """Espera até `timeout` segundos por uma versão diferente de `version_id`."""
+        version = self._local_version(version_id)
+        with self._condition:
+            self._condition.wait_for(lambda: self._history and self.version != version, timeout=timeout)
+        return self.changes_since(version_id)
+
+    def stream(self, version_id):
+        """Gera os eventos SSE de um cliente a partir da versão que ele já tem."""
+        with self._condition:
+            self._subscribers += 1
+            self._start()
+            self._condition.notify_all()
+        try:
+            while True:
+                event = self.wait_for_changes(version_id, self.keepalive)
+                if event is None:
+                    # Comentário SSE: mantém a conexão aberta em proxies que encerram conexões ociosas
+                    yield ': ping\n\n'
+                    continue
+                version_id = event['version']
+                yield f"id: {version_id}\nevent: status\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+
+
+status_broadcaster = StatusBroadcaster(**live_config)
+
+############################################### ARQUIVOS ESTÁTICOS E COMPRESSÃO
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+VENDOR_DIR = os.path.join(STATIC_DIR, 'vendor')
+
+STATIC_MAX_AGE = 365 * 24 * 60 * 60   # Arquivos com impressão digital na URL nunca mudam
+COMPRESS_MIN_SIZE = 500               # Respostas menores que isso não compensam comprimir
+COMPRESS_MIMETYPES = {'text/html', 'text/css', 'text/plain', 'application/json',
+                      'application/javascript', 'text/javascript'}
+
+# Bibliotecas de terceiros servidas de static/vendor (versionadas no repositório, instaladas
+# com 'flask vendor-assets'). Um arquivo ausente é registrado como erro e a página usa o
+# mesmo arquivo na CDN, que não carrega em redes sem acesso à internet
+VENDOR_ASSETS = {
+    'bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@4.5.2/dist/css/bootstrap.min.css',
+    'bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@4.5.2/dist/js/bootstrap.bundle.min.js',
+    'jquery.slim.min.js': 'https://cdn.jsdelivr.net/npm/jquery@3.5.1/dist/jquery.slim.min.js',
+}
+
+_fingerprints = {}          # caminho -> (data de modificação, impressão digital)
+_missing_vendor = set()     # Arquivos de VENDOR_ASSETS ausentes já registrados neste processo
+_compressed_static = {}     # (caminho, ETag, codificação) -> conteúdo comprimido
+
+def _fingerprint(path):
+    """Hash curto do conteúdo do arquivo, recalculado só quando o arquivo muda."""
+    mtime = os.path.getmtime(path)
+    cached = _fingerprints.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as f:
+            cached = (mtime, hashlib.sha256(f.read()).hexdigest()[:12])
+        _fingerprints[path] = cached
+    return cached[1]
+
+@app.template_global()
+def static_url(filename):
+    """URL de um arquivo de static/ com a impressão digital do conteúdo, para cache de longa duração."""
+    return url_for('static', filename=filename, v=_fingerprint(os.path.join(STATIC_DIR, filename)))
+
+@app.template_global()
+def vendor_url(filename):
+    """URL local de uma biblioteca de VENDOR_ASSETS, ou a da CDN (com erro no log) se ela faltar."""
+    if os.path.exists(os.path.join(VENDOR_DIR, filename)):
+        return static_url(f'vendor/{filename}')
+    if filename not in _missing_vendor:
+        _missing_vendor.add(filename)
+        print(f"Erro: static/vendor/{filename} não encontrado; usando a CDN, que não carrega sem acesso "
+              f"à internet (instale com 'flask --app Dashboard vendor-assets')")
+    return VENDOR_ASSETS[filename]
+
+@app.template_global()
+def plotly_url():
+    """URL do plotly.js local, versionada pela versão do pacote plotly instalado."""
+    return url_for('plotly_js', v=plotly.__version__)
+
+def _brotli():
+    """Retorna o módulo brotli, se instalado (dependência opcional)."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def accepted_encoding():
+    """Melhor compressão aceita pelo cliente: br (se brotli estiver instalado), gzip ou None."""
+    if request.accept_encodings['br'] and _brotli():
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return _brotli().compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+############################################### SERVIDOR DE PRODUÇÃO
+
+READY_TIMEOUT = 2   # SEGUNDOS DE ESPERA POR UMA CONEXÃO LIVRE NA VERIFICAÇÃO DE /ready
+
+def reset_after_fork():
+    """Recria, no processo filho, o estado que não pode ser compartilhado entre processos.
+
+    Com o app pré-carregado (gunicorn --preload), os workers nascem de um fork do processo
+    principal e herdariam dele o pool de conexões, as threads de consulta e a thread do
+    status ao vivo. Threads não sobrevivem ao fork e sockets não podem ser divididos entre
+    processos, então cada worker abre os seus. As conexões herdadas não são fechadas aqui:
+    o fechamento enviaria o encerramento pelo socket que ainda pertence ao processo pai.
+    """
+    global _pool, _pool_lock, query_executor, status_broadcaster
+    _pool = None
+    _pool_lock = threading.Lock()
+    query_executor = QueryExecutor(**query_config)
+    status_broadcaster = StatusBroadcaster(**live_config)
+
+# Vale para qualquer servidor que crie os workers por fork (gunicorn, uWSGI...)
+os.register_at_fork(after_in_child=reset_after_fork)
+
+def create_app(db=None, pool=None):
+    """Prepara e retorna a aplicação. Usada pelo wsgi.py e pelo servidor de desenvolvimento.
+
+    As configurações vêm das variáveis de ambiente DASHBOARD_*, lidas ao importar o
+    módulo; `db` e `pool` sobrescrevem valores de db_config e pool_config.
+    """
+    global _pool
+    if db or pool:
+        db_config.update(db or {})
+        pool_config.update(pool or {})
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+    if not db_config['user']:
+        print("Aviso: DASHBOARD_DB_USER não definido; configure o acesso ao banco (ver README).")
+    return app
+
+@app.route('/')
+def index():
+    selected_date = request.args.get('selected_date', default=pd.Timestamp.now().strftime('%Y-%m-%d'), type=str)
+    actual_date = pd.to_datetime(selected_date).date()
+
+    # Dias passados não mudam mais depois que o snapshot foi gravado
+    return response_cache.get_or_set(
+        ('index', actual_date.isoformat()),
+        lambda: render_daily_dashboard(actual_date),
+        ttl=response_cache.ttl_for(actual_date),
+        tags=(actual_date.isoformat(),),
     )
-    
-    fig.update_layout(
-        title_font_size=22,             # Define o tamanho da fonte do título
-        xaxis_title='Data',             # Define um título para os dados do eixo X
-        yaxis_title='Quantidade',       # Define um título para os dados do eixo Y
-        legend_title='Legenda',         # Define o título da legenda
-        legend_title_font_size=12,      # Define o tamanho da fonte to título da legenda
-        legend_font_size=12,            # Define o tamanho da fonte da legenda
-        title_x=0.5,                    # ?
-        xaxis_tickformat='%d/%m',       # Formatar a data no eixo X
-        width=1900,                     # Definindo a largura do gráfico
-        height=700,                     # Definindo a altura do gráfico
-        plot_bgcolor='white'            # Muda a cor do background
+
+def count_daily_default(actual_date):
+    """Totalizadores zerados do dashboard diário."""
+    return daily_counters(pd.DataFrame(), pd.DataFrame(), actual_date, actual_date - timedelta(days=1))
+
+def summary_params(actual_date, today):
+    """Parâmetros de RESUMO_DIA_QUERY (ou de ESTADO_RESUMO_DIA_QUERY, se `today`)."""
+    params = (actual_date, actual_date, actual_date - timedelta(days=1), actual_date)
+    return params if today else params + (actual_date,)
+
+def fetch_counters(query, params, name):
+    """Executa uma consulta de totalizadores (uma linha de contagens) e retorna o dicionário."""
+    df = fetch_data(query, params=params, name=name)
+    if df.empty:
+        return {}
+    return {column: int(value) for column, value in df.iloc[0].items()}
+
+def fetch_snapshot_counters(actual_date):
+    """Totais do snapshot gravado no dia: do rollup, ou contados em dados se o dia não estiver nele."""
+    counters = fetch_counters(ROLLUP_RESUMO_QUERY, (actual_date,), 'rollup_resumo')
+    return counters or fetch_counters(RESUMO_GERAL_QUERY, (actual_date,), 'resumo_geral')
+
+def daily_summary(actual_date):
+    """Busca no banco os totalizadores do dashboard diário (em cache por data)."""
+    # O dia atual é lido do estado atual dos equipamentos; dias passados, do rollup e do histórico
+    today = actual_date == datetime.now().date()
+
+    def compute():
+        # As duas consultas são independentes e rodam ao mesmo tempo
+        if today:
+            geral = query_executor.submit('estado_resumo_geral', fetch_counters, ESTADO_RESUMO_GERAL_QUERY,
+                                          (actual_date,), 'estado_resumo_geral')
+            dia_name, dia_query = 'estado_resumo_dia', ESTADO_RESUMO_DIA_QUERY
+        else:
+            geral = query_executor.submit('rollup_resumo', fetch_snapshot_counters, actual_date)
+            dia_name, dia_query = 'resumo_dia', RESUMO_DIA_QUERY
+        dia_atual = query_executor.submit(dia_name, fetch_counters, dia_query, summary_params(actual_date, today), dia_name)
+        counters = count_daily_default(actual_date)
+        counters.update(geral.result(default={}))
+        counters.update(dia_atual.result(default={}))
+        return counters
+
+    return response_cache.get_or_set(
+        ('resumo_diario', actual_date.isoformat()),
+        compute,
+        ttl=response_cache.ttl_for(actual_date),
+        tags=(actual_date.isoformat(),),
     )
+
+def render_daily_dashboard(actual_date):
+    """Consulta os dados do dia e renderiza o dashboard diário."""
     
-    fig.update_traces(
-        marker_size=12
-    )
+    ############################################### VARIÁVEIS IMPORTANTES
     
-    fig.update_xaxes(
-        mirror=True,
-        ticks='outside',
-        showline=True,
-        linecolor='lightgrey',
-        gridcolor='lightgrey'
-    )
-    fig.update_yaxes(
-        mirror=True,
-        ticks='outside',
-        showline=True,
-        linecolor='lightgrey',
-        gridcolor='lightgrey'
-    )
+    previous_date = actual_date - timedelta(days=1)
     
-    # Converter o gráfico para HTML
-    conn_line_html = pio.to_html(fig, full_html=False)
+    actual_date_day = actual_date.day
+    actual_date_month = actual_date.month
+    actual_date_year = actual_date.year
     
-    formatted_actual_complete = f"{year}-{month:02d}"
+    previous_date_day = previous_date.day
+    previous_date_month = previous_date.month
+    
+    formatted_actual_day_month = f"{actual_date_day:02d}/{actual_date_month:02d}"
+    formatted_actual_complete = f"{actual_date_day:02d}/{actual_date_month:02d}/{actual_date_year}"
     
+    formatted_previous_day_month = f"{previous_date_day:02d}/{previous_date_month:02d}"
     
+    ############################################### TOTALIZADORES
+
+    # Só a primeira página da tabela vai no HTML; as demais são carregadas por /api/dados.
+    # Ela é buscada enquanto as consultas dos totalizadores rodam
+    page = query_executor.submit('dados_pagina', fetch_dados_page, dados_page_state(actual_date))
+
+    # Os gráficos são montados no navegador a partir de /api/graficos/diario
+    counters = daily_summary(actual_date)
+    nao_trafegaram_recentemente = counters['total_equips_trafego'] - counters['total_trafegaram_recente']
+
+    df_page, next_cursor = page.result(default=(pd.DataFrame(), None))
+    with timed('tabela'):
+        data_html = generate_data_html(df_page, actual_date)
+
+    # O dia atual recebe as mudanças por /api/status/stream a partir da versão vista agora
+    live_url = None
+    if actual_date == datetime.now().date():
+        live_url = url_for('api_status_stream', version=status_broadcaster.version_id())
+
+    with timed('template'):
+        return render_template('index.html',
+                               data_html=data_html,
+                               table_date=actual_date.isoformat(),
+                               next_cursor=next_cursor,
+                               live_url=live_url,
+                               total_equipamentos=counters['total_equipamentos'],
+                               conectados=counters['conectados'],
+                               desconectados=counters['desconectados'],
+                               total_today=counters['total_today'],
+                               conectados_today=counters['conectados_today'],
+                               desconectados_today=counters['desconectados_today'],
+                               total_equips_trafego=counters['total_equips_trafego'],
+                               total_trafegaram_recente=counters['total_trafegaram_recente'],
+                               nao_trafegaram_recentemente=nao_trafegaram_recentemente,
+                               formatted_actual_day_month=formatted_actual_day_month,
+                               formatted_previous_day_month=formatted_previous_day_month,
+                               formatted_actual_complete=formatted_actual_complete)
+
+@app.route('/update_date', methods=['POST'])
+def update_date():
+    selected_date = request.form.get('date')
+    return redirect(url_for('index', selected_date=selected_date))
+
+
+def monthly_summary(month_start, month_end):
+    """Busca os totais diários do mês no rollup e calcula as médias (em cache por mês)."""
+    def compute():
+        df_rollup = fetch_data(ROLLUP_MENSAL_QUERY, params=(month_start, month_end), name='rollup_mensal')
+        return {
+            'rollup': df_rollup,
+            'medias': monthly_averages(df_rollup),
+        }
+
+    # Meses passados não mudam mais
+    return response_cache.get_or_set(
+        ('resumo_mensal', month_start.strftime('%Y-%m')),
+        compute,
+        ttl=response_cache.ttl_for(month_end - timedelta(days=1)),
+        tags=(month_start.strftime('%Y-%m'),),
+    )
+
+@app.route('/dashboard-mensal')
+def dashboard_mensal():
+    # Obter o mês e ano a partir dos parâmetros da URL
+    selected_month = request.args.get('month', default=pd.Timestamp.now().strftime('%Y-%m'), type=str)
+    
+    # Converter o mês selecionado para ano e mês
+    year, month = map(int, selected_month.split('-'))
+
     actual_date = datetime.now()
     formatted_actual_date = actual_date.strftime('%d/%m/%Y')
     
-    data_html = generate_data_html(df, actual_date)
+    # Primeira página da tabela com o snapshot do dia atual; as demais vêm de /api/dados.
+    # Ela é buscada enquanto o rollup do mês é consultado
+    page = query_executor.submit(
+        'tabela_atual',
+        response_cache.get_or_set,
+        ('tabela_atual', actual_date.date().isoformat()),
+        lambda: fetch_dados_page(dados_page_state(actual_date.date())),
+        ttl=response_cache.current_ttl,
+        tags=(actual_date.date().isoformat(),),
+    )
+
+    # O gráfico é montado no navegador a partir de /api/graficos/mensal
+    averages = monthly_summary(*month_range(year, month))['medias']
+
+    formatted_actual_complete = f"{year}-{month:02d}"
+
+    df_page, next_cursor = page.result(default=(pd.DataFrame(), None))
+    with timed('tabela'):
+        data_html = generate_data_html(df_page, actual_date.date())
     
-    return render_template('dashboard-mensal.html',
-                           conn_line_html=conn_line_html,
-                           formatted_actual_complete=formatted_actual_complete,
-                           selected_month=selected_month,
-                           media_cadastrados=media_cadastrados,
-                           media_conectados=media_conectados,
-                           media_desconectados=media_desconectados,
-                           formatted_actual_date=formatted_actual_date,
-                           data_html=data_html)
+    with timed('template'):
+        return render_template('dashboard-mensal.html',
+                               formatted_actual_complete=formatted_actual_complete,
+                               selected_month=selected_month,
+                               media_cadastrados=averages['equipsMovimentacao'],
+                               media_conectados=averages['equipsConectados'],
+                               media_desconectados=averages['equipsDesconectados'],
+                               formatted_actual_date=formatted_actual_date,
+                               data_html=data_html,
+                               table_date=actual_date.date().isoformat(),
+                               next_cursor=next_cursor)
     
 @app.route('/update_month', methods=['POST'])
 def update_month():
@@ -497,10 +2230,802 @@ def update_month():
     
     # Redirecionar para o dashboard mensal com o mês selecionado
     return redirect(url_for('dashboard_mensal', month=selected_month))
+
+
+@app.route('/api/graficos/diario')
+def api_graficos_diario():
+    # Especificações dos gráficos de pizza do dashboard diário
+    selected_date = request.args.get('date', default=pd.Timestamp.now().strftime('%Y-%m-%d'), type=str)
+    try:
+        actual_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'erro': "data inválida: use date=AAAA-MM-DD"}), 400
+    counters = daily_summary(actual_date)
+    with timed('graficos'):
+        charts = daily_charts(actual_date, counters)
+    return jsonify(charts)
+
+
+@app.route('/api/graficos/mensal')
+def api_graficos_mensal():
+    # Especificação do gráfico de linhas do dashboard mensal
+    selected_month = request.args.get('month', default=pd.Timestamp.now().strftime('%Y-%m'), type=str)
+    try:
+        month = datetime.strptime(selected_month, '%Y-%m')
+    except ValueError:
+        return jsonify({'erro': "mês inválido: use month=AAAA-MM"}), 400
+    df_rollup = monthly_summary(*month_range(month.year, month.month))['rollup']
+    with timed('graficos'):
+        charts = monthly_charts(df_rollup)
+    return jsonify(charts)
+
+
+@app.route('/api/tendencia')
+def api_tendencia():
+    # Totais da frota em um intervalo qualquer (start/end AAAA-MM-DD), agrupados por dia, semana ou mês
+    try:
+        start_date, end_date, bucket = parse_period(request.args.get('start'), request.args.get('end'),
+                                                    request.args.get('agrupamento'))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    def compute():
+        df_rollup = fetch_data(ROLLUP_PERIODO_QUERY, params=(start_date, end_date + timedelta(days=1)),
+                               name='rollup_periodo')
+        with timed('tendencia'):
+            return fleet_trend(df_rollup, bucket)
+
+    trend = response_cache.get_or_set(
+        ('tendencia', start_date.isoformat(), end_date.isoformat(), bucket),
+        compute,
+        ttl=response_cache.ttl_for(end_date),
+        tags=period_tags(start_date, end_date),
+    )
+    return jsonify(dict(trend, inicio=start_date.isoformat(), fim=end_date.isoformat(), agrupamento=bucket))
+
+
+@app.route('/api/equipamentos/<numero_serie>/historico')
+def api_historico_equipamento(numero_serie):
+    # Linha do tempo de um equipamento: disponibilidade, mudanças de status e dias sem tráfego
+    try:
+        start_date, end_date, bucket = parse_period(request.args.get('start'), request.args.get('end'),
+                                                    request.args.get('agrupamento'))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    def compute():
+        df = fetch_data(HISTORICO_EQUIPAMENTO_QUERY, params=(numero_serie, start_date, end_date + timedelta(days=1)),
+                        name='historico_equipamento')
+        if df.empty:
+            return None
+        with timed('historico'):
+            return device_history(df, bucket)
+
+    history = response_cache.get_or_set(
+        ('historico_equipamento', numero_serie, start_date.isoformat(), end_date.isoformat(), bucket),
+        compute,
+        ttl=response_cache.ttl_for(end_date),
+        tags=period_tags(start_date, end_date),
+    )
+    if history is None:
+        return jsonify({'erro': f"nenhum snapshot do equipamento {numero_serie} no intervalo"}), 404
+    return jsonify(dict(history, numSerieEquip=numero_serie, inicio=start_date.isoformat(),
+                        fim=end_date.isoformat(), agrupamento=bucket))
+
+
+@app.route('/api/alertas')
+def api_alertas():
+    # Equipamentos com alerta (tipo, modelo, dias_min de dias sem tráfego, horas_min sem conexão), do mais grave ao menos grave
+    tipo = request.args.get('tipo')
+    if tipo and tipo not in ALERTA_TIPOS:
+        return jsonify({'erro': f"tipo inválido: use {'|'.join(ALERTA_TIPOS)}"}), 400
+    limit = min(max(request.args.get('limit', default=ALERTAS_PAGE_SIZE, type=int), 1), ALERTAS_MAX_PAGE_SIZE)
+    query, params = alerts_query(tipo, request.args.get('modelo'), request.args.get('dias_min', type=int),
+                                 request.args.get('horas_min', type=int), limit)
+
+    def compute():
+        df_resumo = fetch_data(ALERTAS_RESUMO_QUERY, name='alertas_resumo')
+        df = fetch_data(query, params=params, name='alertas')
+        alerts = []
+        for record in df.to_dict('records') if not df.empty else []:
+            detected = record.pop('detectadoEm')
+            alert = {column: _json_value(value) for column, value in record.items()}
+            alert['detectadoEm'] = None if pd.isna(detected) else pd.Timestamp(detected).isoformat()
+            alerts.append(alert)
+        updated = pd.to_datetime(df_resumo['atualizadoEm']).max() if not df_resumo.empty else None
+        return {
+            'atualizado_em': updated.isoformat() if updated is not None else None,
+            'resumo': {tipo: int(df_resumo.loc[df_resumo['tipo'] == tipo, 'total'].sum()) if not df_resumo.empty else 0
+                       for tipo in ALERTA_TIPOS},
+            'alertas': alerts,
+        }
+
+    # Os alertas mudam a cada execução do detect-alerts (em outro processo), então valem pouco tempo
+    result = response_cache.get_or_set(('alertas', query, params), compute, ttl=response_cache.current_ttl)
+    return jsonify(result)
+
+
+@app.route('/vendor/plotly.min.js')
+def plotly_js():
+    # plotly.js servido localmente a partir do pacote plotly (sem depender de CDN). O cache
+    # de longa duração é aplicado em finish_response quando a URL traz a versão (plotly_url)
+    return send_from_directory(os.path.join(os.path.dirname(plotly.__file__), 'package_data'), 'plotly.min.js')
+
+
+@app.route('/api/dados')
+def api_dados():
+    # Página de linhas da tabela dados para uma data, com filtros e cursor de continuação
+    limit = min(max(request.args.get('limit', default=DADOS_PAGE_SIZE, type=int), 1), DADOS_MAX_PAGE_SIZE)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            state = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+    else:
+        sort = request.args.get('sort', default='conexao')
+        order = request.args.get('order', default='desc')
+        if sort not in DADOS_SORTS or order not in ('asc', 'desc'):
+            return jsonify({'erro': f"ordenação inválida: use sort={'|'.join(DADOS_SORTS)} e order=asc|desc"}), 400
+        selected_date = request.args.get('date', default=pd.Timestamp.now().strftime('%Y-%m-%d'), type=str)
+        try:
+            selected_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'erro': "data inválida: use date=AAAA-MM-DD"}), 400
+        state = dados_page_state(selected_date, sort, order,
+                                 request.args.get('status'), request.args.get('modelo'))
+
+    actual_date = pd.to_datetime(state['date']).date()
+    df_page, next_cursor = fetch_dados_page(state, limit)
+    return jsonify({
+        'date': state['date'],
+        'rows': dados_rows_json(df_page, actual_date),
+        'next_cursor': next_cursor,
+    })
+
+
+@app.route('/export')
+def export():
+    # Exporta o snapshot de um dia (date=AAAA-MM-DD) ou de um mês (month=AAAA-MM) em CSV ou Parquet
+    export_format = request.args.get('format', default='csv')
+    kind = request.args.get('tipo', default='geral')
+    if export_format not in EXPORT_FORMATS or kind not in EXPORT_QUERIES:
+        return jsonify({'erro': f"use format={'|'.join(EXPORT_FORMATS)} e tipo={'|'.join(EXPORT_QUERIES)}"}), 400
+    if export_format == 'parquet' and not export_parquet_available():
+        return jsonify({'erro': "exportação em Parquet requer o pacote pyarrow"}), 400
+
+    selected_month = request.args.get('month')
+    selected_date = request.args.get('date', default=pd.Timestamp.now().strftime('%Y-%m-%d'), type=str)
+    try:
+        days = export_days(selected_date, selected_month)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    serializer, mimetype = EXPORT_FORMATS[export_format]
+    filename = f"dados_{kind}_{selected_month or days[0].isoformat()}.{export_format}"
+    return Response(serializer(iter_export_rows(days, kind)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
+@app.route('/api/status/stream')
+def api_status_stream():
+    # Server-Sent Events com as mudanças do dia atual. O EventSource reenvia a última
+    # versão recebida no cabeçalho Last-Event-ID ao reconectar
+    version_id = request.headers.get('Last-Event-ID') or request.args.get('version', default='')
+    return Response(status_broadcaster.stream(version_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/ingestao', methods=['POST'])
+def api_ingestao():
+    # Recebe {"date": "AAAA-MM-DD", "equipamentos": [{...}, ...]} e grava no snapshot do dia
+    # Sem token configurado a API fica desativada: ela apaga e regrava linhas de dados
+    auth_error = ingest_auth_error()
+    if auth_error:
+        return auth_error
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('equipamentos'), list):
+        return jsonify({'erro': "envie um JSON com a lista 'equipamentos'"}), 400
+    devices = payload['equipamentos']
+    if len(devices) > INGEST_MAX_DEVICES:
+        return jsonify({'erro': f"no máximo {INGEST_MAX_DEVICES} equipamentos por chamada"}), 413
+    try:
+        snapshot_date = pd.to_datetime(payload.get('date') or datetime.now().strftime('%Y-%m-%d')).date()
+    except ValueError:
+        return jsonify({'erro': 'date inválida: use AAAA-MM-DD'}), 400
+
+    with pooled_connection() as connection:
+        if not connection:
+            return jsonify({'erro': 'sem conexão com o banco de dados'}), 503
+        try:
+            written = ingest_snapshot(connection, snapshot_date, devices)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        except Error as e:
+            print(f"Erro ao gravar snapshot: {e}")
+            return jsonify({'erro': 'falha ao gravar no banco de dados'}), 503
+
+    # Páginas e totais já em cache para a data (e o mês) ficaram desatualizados em todos os processos
+    invalidate_cache(snapshot_date)
+    return jsonify({'date': snapshot_date.isoformat(), 'recebidos': len(devices), 'gravados': written})
+
+
+@app.route('/pool-stats')
+def pool_stats():
+    # Contadores do pool de conexões (retiradas, esperas, timeouts...)
+    return jsonify(get_pool().stats())
+
+
+@app.route('/cache-stats')
+def cache_stats():
+    # Contadores do cache de respostas (acertos, falhas, descartes...)
+    return jsonify(response_cache.stats())
+
+
+@app.route('/health')
+def health():
+    # Liveness: o processo está de pé e atendendo requisições (não consulta o banco)
+    response = jsonify({'status': 'ok', 'pid': os.getpid()})
+    response.cache_control.no_store = True
+    return response
+
+
+@app.route('/ready')
+def ready():
+    # Readiness: o worker consegue uma conexão do pool e o banco responde. Com 503 o
+    # balanceador deixa de enviar requisições a este worker até ele se recuperar
+    pool = get_pool()
+    problem = pool.check(READY_TIMEOUT)
+    response = jsonify({'status': 'erro' if problem else 'ok', 'erro': problem, 'pid': os.getpid(),
+                        'pool': pool.stats()})
+    response.status_code = 503 if problem else 200
+    response.cache_control.no_store = True
+    return response
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    g.timings = []
+
+
+@app.after_request
+def add_request_timings(response):
+    # Expõe as medições da requisição no Server-Timing, no log e nos histogramas de /metrics
+    elapsed = time.perf_counter() - g.request_start
+    route = request.endpoint or 'desconhecida'
+    REQUEST_LATENCY.observe(route, elapsed)
+
+    entries = [f'total;dur={elapsed * 1000:.1f}']
+    for name, seconds, description in g.timings:
+        entry = f'{name};dur={seconds * 1000:.1f}'
+        if description:
+            entry += f';desc="{description}"'
+        entries.append(entry)
+    response.headers['Server-Timing'] = ', '.join(entries)
+
+    request_logger.info(json.dumps({
+        'route': route,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(elapsed * 1000, 1),
+        'timings': [{'name': name, 'duration_ms': round(seconds * 1000, 1), 'desc': description}
+                    for name, seconds, description in g.timings],
+    }, ensure_ascii=False))
+    return response
+
+
+@app.after_request
+def finish_response(response):
+    # Roda antes de add_request_timings (o Flask chama os after_request na ordem inversa)
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+
+    static = request.endpoint in ('static', 'plotly_js')
+    if static and request.args.get('v'):
+        # A URL muda junto com o conteúdo, então o navegador pode guardar o arquivo sem revalidar
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+        response.expires = None
+    elif not static:
+        # Streams (SSE, exportações) seguem sem ETag e sem compressão
+        if response.is_streamed:
+            return response
+        # Páginas e APIs: o navegador revalida e recebe 304 se nada mudou
+        response.add_etag(weak=True)
+        if not response.cache_control.max_age:
+            response.cache_control.no_cache = True
+        response.make_conditional(request)
+        if response.status_code != 200:
+            return response
+
+    if response.mimetype not in COMPRESS_MIMETYPES or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accepted_encoding()
+    if not encoding:
+        return response
+
+    if static:
+        # Arquivos estáticos são comprimidos uma vez e guardados pelo ETag do arquivo
+        etag, _ = response.get_etag()
+        key = (request.path, etag, encoding)
+        if key not in _compressed_static:
+            response.direct_passthrough = False
+            _compressed_static[key] = compress(response.get_data(), encoding)
+        data = _compressed_static[key]
+        # O ETag passa a ser fraco: o conteúdo é o mesmo, só a codificação mudou
+        if etag:
+            response.set_etag(etag, weak=True)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        data = compress(body, encoding)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    response.headers.pop('Accept-Ranges', None)
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    # Métricas no formato de texto do Prometheus
+    lines = []
+    for histogram in (REQUEST_LATENCY, QUERY_LATENCY, CONNECTION_WAIT, STEP_LATENCY, DATAFRAME_MEMORY):
+        lines.extend(histogram.render())
+
+    pool = get_pool().stats()
+    lines.append("# HELP dashboard_pool_connections Conexões do pool por estado.")
+    lines.append("# TYPE dashboard_pool_connections gauge")
+    for state in ('open', 'idle', 'in_use'):
+        lines.append(f'dashboard_pool_connections{{state="{state}"}} {pool[state]}')
+    lines.append("# HELP dashboard_pool_events_total Eventos do pool de conexões.")
+    lines.append("# TYPE dashboard_pool_events_total counter")
+    for event in ('checkouts', 'waits', 'timeouts', 'reconnects', 'connects', 'errors'):
+        lines.append(f'dashboard_pool_events_total{{event="{event}"}} {pool[event]}')
+
+    cache = response_cache.stats()
+    lines.append("# HELP dashboard_cache_events_total Eventos do cache de respostas.")
+    lines.append("# TYPE dashboard_cache_events_total counter")
+    for event in ('hits', 'misses', 'evictions', 'invalidations'):
+        lines.append(f'dashboard_cache_events_total{{event="{event}"}} {cache[event]}')
+
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/cache/invalidate', methods=['POST'])
+def cache_invalidate():
+    # Chamado após gravar um snapshot para descartar as páginas daquela data
+    # (a invalidação vale para todos os processos do servidor, ver invalidate_cache).
+    # Exige o mesmo token da ingestão: sem ele qualquer um manteria o cache vazio
+    auth_error = ingest_auth_error()
+    if auth_error:
+        return auth_error
+    selected_date = request.form.get('date') or request.args.get('date')
+    if not selected_date:
+        invalidate_cache()
+        return jsonify({'invalidated': 'all'})
+    try:
+        snapshot_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'erro': "data inválida: use date=AAAA-MM-DD"}), 400
+    invalidate_cache(snapshot_date)
+    return jsonify({'invalidated': selected_date})
     
     
     
 
 
+############################################### MIGRAÇÕES E VERIFICAÇÃO DE ÍNDICES
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'migrations')
+
+# Tipos de acesso do EXPLAIN que indicam leitura da tabela (ou do índice) inteira
+FULL_SCAN_TYPES = ('ALL', 'index')
+
+# Páginas da tabela de dados: a ordem deve vir do índice, sem ordenar o dia inteiro
+INDEX_ORDERED_QUERIES = ('dados_pagina', 'dados_pagina_registro', 'dados_pagina_seguinte')
+
+def read_migrations():
+    """Retorna (versão, comandos SQL) de cada arquivo de database/migrations, em ordem."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if not filename.endswith('.sql'):
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding='utf-8') as f:
+            lines = [line for line in f if not line.strip().startswith('--')]
+        statements = [statement.strip() for statement in ''.join(lines).split(';') if statement.strip()]
+        migrations.append((filename[:-len('.sql')], statements))
+    return migrations
+
+def apply_migrations(connection):
+    """Aplica as migrações ainda não registradas em schema_migrations e retorna suas versões."""
+    cursor = connection.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        versao VARCHAR(255) PRIMARY KEY,
+        aplicadaEm DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("SELECT versao FROM schema_migrations")
+    applied_versions = {row[0] for row in cursor.fetchall()}
+
+    applied = []
+    for version, statements in read_migrations():
+        if version in applied_versions:
+            continue
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_migrations (versao) VALUES (%s)", (version,))
+        connection.commit()
+        applied.append(version)
+    cursor.close()
+    return applied
+
+def explain_full_scans(connection, actual_date):
+    """Executa EXPLAIN nas consultas dos dashboards e retorna as que fazem varredura completa.
+
+    Em dados particionada, consultas que leem todas as partições também são retornadas, assim
+    como as páginas da tabela de dados que precisam ordenar as linhas (filesort).
+    """
+    partition_count = len(dados_partitions(connection))
+    cursor = connection.cursor(dictionary=True)
+    full_scans = []
+    for name, query, params in dashboard_queries(actual_date):
+        cursor.execute('EXPLAIN ' + query, params)
+        for row in cursor.fetchall():
+            # Tabelas derivadas (<derived2>) já são o resultado agregado da subconsulta
+            if not row['table'] or row['table'].startswith('<'):
+                continue
+            if row['type'] in FULL_SCAN_TYPES:
+                full_scans.append((name, row['table'], row['type']))
+            elif row['table'] == 'dados' and partition_count > 1 and row.get('partitions') \
+                    and len(row['partitions'].split(',')) == partition_count:
+                full_scans.append((name, row['table'], 'todas as partições'))
+            elif name in INDEX_ORDERED_QUERIES and 'filesort' in (row.get('Extra') or ''):
+                full_scans.append((name, row['table'], 'filesort'))
+    cursor.close()
+    return full_scans
+
+############################################### PARTICIONAMENTO E RETENÇÃO
+
+# Partições mensais de dados por criacaoInsert: p202405 guarda maio de 2024 e pmax
+# recebe qualquer data além da última partição criada
+PARTITION_MAX = 'pmax'
+
+def partition_name(month_start):
+    return f"p{month_start.strftime('%Y%m')}"
+
+def partition_month(name):
+    """Primeiro dia do mês guardado na partição (None para pmax ou nomes fora do padrão)."""
+    try:
+        return datetime.strptime(name[1:], '%Y%m').date()
+    except ValueError:
+        return None
+
+def next_month(month_start):
+    return month_range(month_start.year, month_start.month)[1]
+
+def dados_partitions(connection):
+    """Retorna (nome, linhas estimadas) das partições de dados, em ordem; vazia se não particionada."""
+    cursor = connection.cursor()
+    cursor.execute("""
+    SELECT PARTITION_NAME, TABLE_ROWS
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'dados' AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    partitions = [(name, rows) for name, rows in cursor.fetchall()]
+    cursor.close()
+    return partitions
+
+def _partition_definition(month_start):
+    return f"PARTITION {partition_name(month_start)} VALUES LESS THAN ('{next_month(month_start).isoformat()}')"
+
+def create_partitions(connection, months_ahead=None, today=None):
+    """Particiona dados por mês (se ainda não for) e cria as partições até `months_ahead` meses à frente.
+
+    Na primeira vez a tabela é reconstruída com uma partição por mês desde o snapshot mais
+    antigo. Depois, os meses que faltam são separados de pmax, que fica vazia enquanto as
+    partições futuras existirem. Retorna os nomes das partições criadas.
+    """
+    months_ahead = retention_config['months_ahead'] if months_ahead is None else months_ahead
+    today = today or datetime.now().date()
+    last_month = today.replace(day=1)
+    for _ in range(months_ahead):
+        last_month = next_month(last_month)
+
+    existing = [partition_month(name) for name, _ in dados_partitions(connection)]
+    existing = [month for month in existing if month]
+    cursor = connection.cursor()
+    if existing:
+        month = next_month(max(existing))
+    else:
+        cursor.execute("SELECT MIN(criacaoInsert) FROM dados")
+        oldest = cursor.fetchone()[0]
+        month = (oldest or today).replace(day=1)
+
+    months = []
+    while month <= last_month:
+        months.append(month)
+        month = next_month(month)
+    if not months:
+        cursor.close()
+        return []
+
+    definitions = ', '.join([_partition_definition(month) for month in months] +
+                            [f"PARTITION {PARTITION_MAX} VALUES LESS THAN (MAXVALUE)"])
+    if existing:
+        cursor.execute(f"ALTER TABLE dados REORGANIZE PARTITION {PARTITION_MAX} INTO ({definitions})")
+    else:
+        cursor.execute(f"ALTER TABLE dados PARTITION BY RANGE COLUMNS(criacaoInsert) ({definitions})")
+    cursor.close()
+    return [partition_name(month) for month in months]
+
+def expired_partitions(connection, months=None, today=None):
+    """Partições de meses inteiramente fora da retenção, da mais antiga para a mais nova."""
+    months = retention_config['months'] if months is None else months
+    if not months:
+        return []
+    cutoff = (today or datetime.now().date()).replace(day=1)
+    for _ in range(months - 1):
+        cutoff = (cutoff - timedelta(days=1)).replace(day=1)
+    # pmax (sempre a última) nunca é removida
+    partitions = [name for name, _ in dados_partitions(connection)]
+    return [name for name in partitions[:-1] if partition_month(name) and partition_month(name) < cutoff]
+
+def partition_row_count(connection, name):
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM dados PARTITION ({name})")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    return count
+
+def archive_partition(name, archive_dir, export_format='csv'):
+    """Grava o mês da partição em archive_dir (mesmo formato do comando export).
+
+    Retorna (caminho, linhas gravadas).
+    """
+    month = partition_month(name)
+    serializer, _ = EXPORT_FORMATS[export_format]
+    path = os.path.join(archive_dir, f"dados-{month.strftime('%Y-%m')}.{export_format}")
+    archived = 0
+
+    def counted(chunks):
+        nonlocal archived
+        for chunk in chunks:
+            archived += len(chunk)
+            yield chunk
+
+    with open(path, 'wb') as f:
+        for chunk in serializer(counted(iter_export_rows(export_days(selected_month=month.strftime('%Y-%m')), 'geral'))):
+            f.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+    return path, archived
+
+def drop_partition(connection, name):
+    """Remove a partição e suas linhas de dados.
+
+    DROP PARTITION não dispara os triggers: os totais diários em dados_daily_rollup e
+    equipamentos_estado_atual continuam disponíveis para os meses removidos.
+    """
+    cursor = connection.cursor()
+    cursor.execute(f"ALTER TABLE dados DROP PARTITION {name}")
+    cursor.close()
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Aplica as migrações pendentes de database/migrations."""
+    with pooled_connection() as connection:
+        if not connection:
+            raise click.ClickException("Sem conexão com o banco de dados")
+        try:
+            applied = apply_migrations(connection)
+        except Error as e:
+            raise click.ClickException(f"Erro ao aplicar migração: {e}")
+    if applied:
+        for version in applied:
+            click.echo(f"Migração aplicada: {version}")
+    else:
+        click.echo("Banco de dados já está atualizado.")
+
+@app.cli.command('check-indexes')
+@click.option('--date', 'selected_date', default=None, help='Data usada nos parâmetros das consultas (AAAA-MM-DD).')
+def check_indexes_command(selected_date):
+    """Falha se alguma consulta dos dashboards fizer varredura completa da tabela."""
+    actual_date = pd.to_datetime(selected_date).date() if selected_date else datetime.now().date()
+    with pooled_connection() as connection:
+        if not connection:
+            raise click.ClickException("Sem conexão com o banco de dados")
+        full_scans = explain_full_scans(connection, actual_date)
+    for name, table, access_type in full_scans:
+        click.echo(f"Varredura completa: consulta '{name}' na tabela {table} (type={access_type})")
+    if full_scans:
+        raise SystemExit(1)
+    click.echo("Todas as consultas dos dashboards usam índices.")
+
+@app.cli.command('detect-alerts')
+@click.option('--silent-days', type=int, default=None, help='Dias sem tráfego para alertar. Padrão: alert_config.')
+@click.option('--drift-hours', type=int, default=None, help='Horas sem conexão para alertar. Padrão: alert_config.')
+def detect_alerts_command(silent_days, drift_hours):
+    """Recalcula os alertas dos equipamentos a partir do snapshot mais recente."""
+    df = fetch_data(ALERTAS_ESTADO_QUERY, name='alertas_estado')
+    if df.empty:
+        raise click.ClickException("Nenhum equipamento em equipamentos_estado_atual (ou sem conexão com o banco)")
+    run_at = datetime.now().replace(microsecond=0)
+    alerts = detect_alerts(df, run_at, silent_days, drift_hours)
+    with pooled_connection() as connection:
+        if not connection:
+            raise click.ClickException("Sem conexão com o banco de dados")
+        try:
+            written, resolved = store_alerts(connection, alerts, run_at)
+        except Error as e:
+            raise click.ClickException(f"Erro ao gravar os alertas: {e}")
+    counts = alerts['tipo'].value_counts()
+    summary = ', '.join(f"{tipo}: {int(counts.get(tipo, 0))}" for tipo in ALERTA_TIPOS)
+    click.echo(f"{len(df)} equipamentos analisados; {written} alertas ({summary}); {resolved} resolvidos.")
+
+@app.cli.command('create-partitions')
+@click.option('--months-ahead', type=int, default=None, help='Meses futuros com partição pronta. Padrão: retention_config.')
+def create_partitions_command(months_ahead):
+    """Particiona dados por mês de criacaoInsert e cria as partições dos próximos meses."""
+    with pooled_connection() as connection:
+        if not connection:
+            raise click.ClickException("Sem conexão com o banco de dados")
+        try:
+            created = create_partitions(connection, months_ahead)
+        except Error as e:
+            raise click.ClickException(f"Erro ao criar partições: {e}")
+    if created:
+        click.echo(f"Partições criadas: {', '.join(created)}")
+    else:
+        click.echo("Partições já existem para os próximos meses.")
+
+@app.cli.command('apply-retention')
+@click.option('--months', type=int, default=None, help='Meses mantidos em dados. Padrão: retention_config.')
+@click.option('--archive-dir', default=None, type=click.Path(file_okay=False),
+              help='Arquiva cada mês antes de removê-lo. Padrão: retention_config.')
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv')
+@click.option('--dry-run', is_flag=True, help='Só lista as partições que seriam removidas.')
+def apply_retention_command(months, archive_dir, export_format, dry_run):
+    """Arquiva (opcionalmente) e remove as partições de dados fora da retenção."""
+    archive_dir = retention_config['archive_dir'] if archive_dir is None else archive_dir
+    if archive_dir and export_format == 'parquet' and not export_parquet_available():
+        raise click.ClickException("Arquivamento em Parquet requer o pacote pyarrow")
+    with pooled_connection() as connection:
+        if not connection:
+            raise click.ClickException("Sem conexão com o banco de dados")
+        expired = expired_partitions(connection, months)
+        if not expired:
+            click.echo("Nenhuma partição fora da retenção.")
+            return
+        for name in expired:
+            if dry_run:
+                click.echo(f"Seria removida: {name}")
+                continue
+            try:
+                if archive_dir:
+                    os.makedirs(archive_dir, exist_ok=True)
+                    path, archived = archive_partition(name, archive_dir, export_format)
+                    # Confere a contagem antes de remover: um arquivo incompleto não pode liberar a remoção
+                    expected = partition_row_count(connection, name)
+                    if archived != expected:
+                        raise click.ClickException(
+                            f"Arquivo {path} tem {archived} de {expected} linhas; a partição {name} foi mantida")
+                    click.echo(f"Arquivada: {path}")
+                drop_partition(connection, name)
+            except Error as e:
+                raise click.ClickException(f"Erro ao remover a partição {name}: {e}")
+            click.echo(f"Partição removida: {name}")
+
+@app.cli.command('vendor-assets')
+@click.option('--force', is_flag=True, help='Baixa de novo os arquivos que já existem.')
+@click.option('--source', default=None, type=click.Path(exists=True, file_okay=False),
+              help='Pasta com os arquivos já baixados (mesmos nomes de VENDOR_ASSETS), no lugar da CDN.')
+def vendor_assets_command(force, source):
+    """Baixa Bootstrap e jQuery para static/vendor, para as páginas funcionarem sem acesso à internet.
+
+    Em máquinas sem acesso à CDN, copie os arquivos de outra máquina e use --source.
+    """
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    for filename, url in VENDOR_ASSETS.items():
+        path = os.path.join(VENDOR_DIR, filename)
+        if os.path.exists(path) and not force:
+            click.echo(f"Já existe: {filename}")
+            continue
+        try:
+            if source:
+                with open(os.path.join(source, filename), 'rb') as f:
+                    content = f.read()
+            else:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    content = response.read()
+        except OSError as e:
+            raise click.ClickException(f"Erro ao obter {filename} de {source or url}: {e}")
+        with open(path, 'wb') as f:
+            f.write(content)
+        click.echo(f"{'Copiado' if source else 'Baixado'}: {filename} ({len(content)} bytes)")
+
+@app.cli.command('backfill-rollup')
+@click.option('--start', default=None, help='Primeiro dia a recalcular (AAAA-MM-DD). Padrão: início do histórico.')
+@click.option('--end', default=None, help='Último dia a recalcular (AAAA-MM-DD). Padrão: hoje.')
+def backfill_rollup_command(start, end):
+    """Recalcula dados_daily_rollup a partir da tabela dados."""
+    start_date = pd.to_datetime(start).date() if start else datetime(1970, 1, 1).date()
+    end_date = pd.to_datetime(end).date() if end else datetime.now().date()
+    with pooled_connection() as connection:
+        if not connection:
+            raise click.ClickException("Sem conexão com o banco de dados")
+        try:
+            cursor = connection.cursor()
+            cursor.execute(ROLLUP_BACKFILL_QUERY, (start_date, end_date + timedelta(days=1)))
+            connection.commit()
+            cursor.close()
+        except Error as e:
+            raise click.ClickException(f"Erro ao recalcular o rollup: {e}")
+    # Os dashboards em execução descartam as páginas calculadas com o rollup anterior
+    publish_invalidation()
+    click.echo(f"Rollup recalculado de {start_date} a {end_date}.")
+
+@app.cli.command('export')
+@click.option('--date', 'selected_date', default=None, help='Dia a exportar (AAAA-MM-DD). Padrão: hoje.')
+@click.option('--month', 'selected_month', default=None, help='Mês a exportar (AAAA-MM), no lugar de --date.')
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv')
+@click.option('--tipo', 'kind', type=click.Choice(list(EXPORT_QUERIES)), default='geral')
+@click.option('--output', required=True, type=click.Path(dir_okay=False), help='Arquivo de saída.')
+def export_command(selected_date, selected_month, export_format, kind, output):
+    """Exporta snapshots de dados em CSV ou Parquet, em blocos."""
+    if export_format == 'parquet' and not export_parquet_available():
+        raise click.ClickException("Exportação em Parquet requer o pacote pyarrow")
+    try:
+        days = export_days(selected_date or datetime.now().strftime('%Y-%m-%d'), selected_month)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    serializer, _ = EXPORT_FORMATS[export_format]
+    with open(output, 'wb') as f:
+        try:
+            for chunk in serializer(iter_export_rows(days, kind)):
+                f.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        except Error as e:
+            raise click.ClickException(f"Exportação interrompida, {output} está incompleto: {e}")
+    click.echo(f"Exportação gravada em {output}")
+
+@app.cli.command('ingest')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--date', 'selected_date', default=None, help='Data do snapshot (AAAA-MM-DD). Padrão: hoje.')
+@click.option('--batch-size', type=int, default=None, help='Linhas por INSERT e por transação.')
+def ingest_command(path, selected_date, batch_size):
+    """Grava no snapshot do dia os equipamentos de um arquivo CSV ou JSON."""
+    snapshot_date = pd.to_datetime(selected_date).date() if selected_date else datetime.now().date()
+    batch_size = batch_size or ingest_config['batch_size']
+    written = 0
+    with pooled_connection() as connection:
+        if not connection:
+            raise click.ClickException("Sem conexão com o banco de dados")
+        # Cada bloco do arquivo é gravado em sua própria transação
+        batch = []
+        try:
+            for device in read_ingest_file(path):
+                batch.append(device)
+                if len(batch) == batch_size:
+                    written += ingest_snapshot(connection, snapshot_date, batch, batch_size)
+                    batch = []
+            if batch:
+                written += ingest_snapshot(connection, snapshot_date, batch, batch_size)
+        except ValueError as e:
+            raise click.ClickException(f"Arquivo inválido ({written} equipamentos já gravados): {e}")
+        except Error as e:
+            raise click.ClickException(f"Erro ao gravar snapshot ({written} equipamentos já gravados): {e}")
+    # Os dashboards em execução descartam as páginas da data, como na ingestão pela API
+    publish_invalidation(snapshot_date)
+    click.echo(f"{written} equipamentos gravados no snapshot de {snapshot_date}.")
+
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Servidor de desenvolvimento; em produção use o gunicorn (ver README)
+    create_app().run(host=env_str('DASHBOARD_HOST', '127.0.0.1'), port=env_int('DASHBOARD_PORT', 5000),
+                     debug=env_str('DASHBOARD_DEBUG') == '1')
@@ -0,0 +1,306 @@
+"""Frota sintética de equipamentos e bancos de dados para os benchmarks do dashboard.
+
+Gera N equipamentos x D dias de snapshots na tabela dados e permite apontar o
+Dashboard para um MySQL/MariaDB local ou para um arquivo SQLite que faz o papel
+do MySQL.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import date, datetime, time, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Dashboard  # noqa: E402
+
+
+# Participação de cada modelo na frota
+MODELOS = {
+    'Henry Prisma': 0.35,
+    'Control iD iDClass': 0.30,
+    'Dimep Printpoint': 0.20,
+    'Madis Rodbel': 0.15,
+}
+
+PORTAS = [80, 3000, 3001, 4370]
+
+# Probabilidades de transição diária do status de cada equipamento
+CHANCE_CONTINUAR_CONECTADO = 0.95
+CHANCE_RECONECTAR = 0.40
+
+# Chance de um equipamento conectado trafegar registros no dia
+CHANCE_TRAFEGO = 0.70
+
+INSERT_QUERY = """
+INSERT INTO dados (criacaoInsert, modeloEquip, numSerieEquip, ipEquip, portaEquip, statusEquip,
+                   dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def generate_snapshots(devices, days, end_date=None, seed=42):
+    """Gera (dia, linhas) com o snapshot de toda a frota em cada um dos `days` dias até `end_date`."""
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days - 1)
+
+    frota = []
+    for i in range(devices):
+        conectado = rng.random() < 0.85
+        ultima_conexao = start_date - timedelta(days=0 if conectado else rng.randint(1, 30))
+        frota.append({
+            'modelo': rng.choices(list(MODELOS), weights=list(MODELOS.values()))[0],
+            'serie': f'{i:08d}',
+            'ip': f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}',
+            'porta': rng.choice(PORTAS),
+            'conectado': conectado,
+            'ultima_conexao': ultima_conexao,
+            'hora': rng.randint(0, 86399),
+            'ultimo_registro': ultima_conexao - timedelta(days=rng.choice([0, 0, 1, 2, 7, 30])),
+        })
+
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        rows = []
+        for equip in frota:
+            chance = CHANCE_CONTINUAR_CONECTADO if equip['conectado'] else CHANCE_RECONECTAR
+            equip['conectado'] = rng.random() < chance
+            if equip['conectado']:
+                equip['ultima_conexao'] = day
+                equip['hora'] = rng.randint(0, 86399)
+                if rng.random() < CHANCE_TRAFEGO:
+                    equip['ultimo_registro'] = day
+            hora = equip['hora']
+            rows.append((
+                day.isoformat(),
+                equip['modelo'],
+                equip['serie'],
+                equip['ip'],
+                equip['porta'],
+                'Conectado' if equip['conectado'] else 'Desconectado',
+                equip['ultima_conexao'].isoformat(),
+                f'{hora // 3600:02d}:{hora // 60 % 60:02d}:{hora % 60:02d}',
+                equip['ultimo_registro'].isoformat(),
+            ))
+        yield day, rows
+
+
+############################################### SQLITE NO LUGAR DO MYSQL
+
+# O SQLite devolve o nome da coluna como declarado na tabela (e não como escrito no
+# SELECT, como faz o MySQL), por isso horaUltimaconexao segue a grafia das consultas
+SQLITE_SCHEMA = """
+CREATE TABLE dados (
+    idDado INTEGER PRIMARY KEY AUTOINCREMENT,
+    criacaoInsert DATE,
+    modeloEquip VARCHAR(255),
+    numSerieEquip VARCHAR(255),
+    ipEquip VARCHAR(45),
+    portaEquip INT,
+    statusEquip VARCHAR(12),
+    dataUltimaConexao DATE,
+    horaUltimaconexao TIME,
+    dataUltimoRegistro DATE
+);
+
+CREATE TABLE dados_daily_rollup (
+    data DATE PRIMARY KEY,
+    total INT NOT NULL DEFAULT 0,
+    conectados INT NOT NULL DEFAULT 0,
+    desconectados INT NOT NULL DEFAULT 0,
+    com_trafego INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE equipamentos_estado_atual (
+    numSerieEquip VARCHAR(255) PRIMARY KEY,
+    atualizadoEm DATE NOT NULL,
+    modeloEquip VARCHAR(255),
+    ipEquip VARCHAR(45),
+    portaEquip INT,
+    statusEquip VARCHAR(12),
+    dataUltimaConexao DATE,
+    horaUltimaConexao TIME,
+    dataUltimoRegistro DATE
+);
+
+CREATE INDEX idx_estado_atualizado
+    ON equipamentos_estado_atual (atualizadoEm, dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro);
+CREATE INDEX idx_estado_conexao
+    ON equipamentos_estado_atual (dataUltimaConexao, horaUltimaConexao);
+
+CREATE TABLE equipamentos_alertas (
+    numSerieEquip VARCHAR(255) NOT NULL,
+    tipo VARCHAR(20) NOT NULL,
+    modeloEquip VARCHAR(255),
+    diasSemTrafego INT,
+    horasSemConexao INT,
+    dataUltimaConexao DATE,
+    horaUltimaConexao TIME,
+    dataUltimoRegistro DATE,
+    detectadoEm DATETIME NOT NULL,
+    atualizadoEm DATETIME NOT NULL,
+    PRIMARY KEY (numSerieEquip, tipo)
+);
+
+CREATE TABLE cache_invalidacoes (
+    idInvalidacao INTEGER PRIMARY KEY AUTOINCREMENT,
+    dataReferencia DATE NULL,
+    criadoEm TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Mesmo cálculo do ROLLUP_BACKFILL_QUERY, com as funções de data do SQLite
+SQLITE_ROLLUP_QUERY = """
+INSERT OR REPLACE INTO dados_daily_rollup (data, total, conectados, desconectados, com_trafego)
+SELECT
+    criacaoInsert,
+    COUNT(*),
+    COUNT(CASE WHEN statusEquip = 'Conectado' THEN 1 END),
+    COUNT(CASE WHEN statusEquip = 'Desconectado' THEN 1 END),
+    COUNT(CASE WHEN dataUltimoRegistro >= date(criacaoInsert, '-1 day') THEN 1 END)
+FROM dados
+GROUP BY criacaoInsert
+"""
+
+# Mesma carga inicial da migração 004 (no MySQL, o trigger mantém a tabela a cada insert)
+SQLITE_ESTADO_QUERY = """
+INSERT OR REPLACE INTO equipamentos_estado_atual (numSerieEquip, atualizadoEm, modeloEquip, ipEquip, portaEquip,
+                                                  statusEquip, dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro)
+SELECT numSerieEquip, criacaoInsert, modeloEquip, ipEquip, portaEquip, statusEquip,
+       dataUltimaConexao, horaUltimaconexao, dataUltimoRegistro
+FROM dados
+WHERE criacaoInsert = (SELECT MAX(criacaoInsert) FROM dados)
+"""
+
+
+SQLITE_ALERTAS_QUERY = """
+INSERT INTO equipamentos_alertas (numSerieEquip, tipo, modeloEquip, diasSemTrafego, horasSemConexao,
+                                  dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro, detectadoEm, atualizadoEm)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class SQLiteCursor:
+    """Cursor que aceita os parâmetros no estilo %s do mysql.connector."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=None):
+        return self._cursor.execute(query.replace('%s', '?'), params or ())
+
+    def executemany(self, query, rows):
+        return self._cursor.executemany(query.replace('%s', '?'), rows)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SQLiteConnection:
+    """Conexão SQLite com a interface usada pelo Dashboard (cursor, commit, rollback, close)."""
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self, *args, **kwargs):
+        return SQLiteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+
+class SQLitePool:
+    """Substitui o ConnectionPool do Dashboard por conexões a um arquivo SQLite."""
+
+    def __init__(self, path):
+        self.path = path
+        self._stats = {'checkouts': 0, 'waits': 0, 'timeouts': 0, 'reconnects': 0, 'connects': 0, 'errors': 0}
+
+    def acquire(self):
+        self._stats['checkouts'] += 1
+        self._stats['connects'] += 1
+        return SQLiteConnection(self.path)
+
+    def release(self, connection):
+        connection.close()
+
+    def close_all(self):
+        pass
+
+    def stats(self):
+        return dict(self._stats, size=1, open=0, idle=0, in_use=0)
+
+
+def create_sqlite_database(path, devices, days, end_date=None):
+    """Cria o arquivo SQLite com a frota sintética, os índices das migrações, o rollup e o estado atual."""
+    if os.path.exists(path):
+        os.remove(path)
+    connection = SQLiteConnection(path)
+    connection._connection.executescript(SQLITE_SCHEMA)
+    for version, statements in Dashboard.read_migrations():
+        if version.startswith(('002_', '005_', '007_')):
+            for statement in statements:
+                connection._connection.execute(statement)
+    cursor = connection.cursor()
+    for _, rows in generate_snapshots(devices, days, end_date):
+        cursor.executemany(INSERT_QUERY, rows)
+    cursor.execute(SQLITE_ROLLUP_QUERY)
+    cursor.execute(SQLITE_ESTADO_QUERY)
+    # Mesmos alertas que o comando detect-alerts gravaria
+    df = Dashboard.apply_schema(pd.read_sql(Dashboard.ALERTAS_ESTADO_QUERY, connection._connection),
+                                Dashboard.QUERY_SCHEMAS['alertas_estado'])
+    alerts = Dashboard.detect_alerts(df, datetime.combine(end_date or date.today(), time(12)))
+    run_at = datetime.now().replace(microsecond=0).isoformat(sep=' ')
+    cursor.executemany(SQLITE_ALERTAS_QUERY, [
+        tuple(Dashboard._alert_value(value) for value in record) + (run_at, run_at)
+        for record in alerts[Dashboard.ALERTAS_COLUMNS].itertuples(index=False, name=None)
+    ])
+    connection.commit()
+    connection.close()
+
+
+def use_sqlite(path):
+    """Faz o Dashboard usar o arquivo SQLite no lugar do MySQL."""
+    Dashboard._pool = SQLitePool(path)
+
+
+############################################### MYSQL/MARIADB LOCAL
+
+def use_mysql(host, port, user, password, database):
+    """Aponta o db_config do Dashboard para um MySQL/MariaDB local."""
+    Dashboard.create_app(db=dict(host=host, port=port, user=user, password=password, database=database))
+
+
+def load_mysql_database(devices, days, end_date=None):
+    """Aplica as migrações e carrega a frota sintética no MySQL configurado.
+
+    Os dados anteriores das tabelas dados, dados_daily_rollup, equipamentos_estado_atual e
+    equipamentos_alertas são apagados, então use um banco dedicado ao benchmark.
+    """
+    with Dashboard.pooled_connection() as connection:
+        if not connection:
+            raise RuntimeError("Sem conexão com o MySQL do benchmark")
+        Dashboard.apply_migrations(connection)
+        cursor = connection.cursor()
+        cursor.execute("TRUNCATE TABLE dados")
+        cursor.execute("TRUNCATE TABLE dados_daily_rollup")
+        cursor.execute("TRUNCATE TABLE equipamentos_estado_atual")
+        cursor.execute("TRUNCATE TABLE equipamentos_alertas")
+        for _, rows in generate_snapshots(devices, days, end_date):
+            # O rollup e o estado atual são mantidos pelos triggers a cada insert
+            cursor.executemany(INSERT_QUERY, rows)
+            connection.commit()
+        cursor.close()
+        df = Dashboard.fetch_data(Dashboard.ALERTAS_ESTADO_QUERY, name='alertas_estado')
+        run_at = datetime.now().replace(microsecond=0)
+        Dashboard.store_alerts(connection, Dashboard.detect_alerts(df, run_at), run_at)
@@ -0,0 +1,119 @@
+"""Mede o tempo de resposta dos dashboards para frotas de tamanhos diferentes.
+
+Uso:
+    python benchmark/run.py                          # SQLite, frotas de 1k, 10k e 100k
+    python benchmark/run.py --devices 1000 --days 30
+    python benchmark/run.py --mysql-host localhost --mysql-user bench --mysql-database dashboard_bench
+
+Para cada frota, cada rota é chamada pelo test client do Flask e o resultado mostra
+as latências p50/p95, a quantidade de consultas por requisição (lida do cabeçalho
+Server-Timing) e o pico de memória alocada durante uma requisição.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fleet  # noqa: E402
+from fleet import Dashboard  # noqa: E402
+
+
+def routes(end_date, devices):
+    """Rotas medidas: (nome, URL)."""
+    return [
+        ('index', f'/?selected_date={end_date.isoformat()}'),
+        ('graficos_diario', f'/api/graficos/diario?date={end_date.isoformat()}'),
+        ('dashboard_mensal', f'/dashboard-mensal?month={end_date.strftime("%Y-%m")}'),
+        ('graficos_mensal', f'/api/graficos/mensal?month={end_date.strftime("%Y-%m")}'),
+        ('api_dados', f'/api/dados?date={end_date.isoformat()}'),
+        ('tendencia_1_ano', f'/api/tendencia?start={(end_date - timedelta(days=364)).isoformat()}&end={end_date.isoformat()}'),
+        ('historico_1_ano', f'/api/equipamentos/{devices // 2:08d}/historico'
+                            f'?start={(end_date - timedelta(days=364)).isoformat()}&end={end_date.isoformat()}'),
+        ('alertas', '/api/alertas?tipo=sem_trafego'),
+    ]
+
+
+def query_count(response):
+    """Conta as consultas registradas no Server-Timing da resposta."""
+    entries = response.headers.get('Server-Timing', '').split(',')
+    return sum(1 for entry in entries if entry.strip().startswith('q-'))
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(client, url, iterations, warm_cache):
+    """Chama a URL `iterations` vezes e retorna (p50 ms, p95 ms, consultas, pico de memória em MB)."""
+    latencies = []
+    queries = 0
+    for _ in range(iterations):
+        if not warm_cache:
+            Dashboard.response_cache.clear()
+        start = time.perf_counter()
+        response = client.get(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} respondeu {response.status_code}")
+        queries = query_count(response)
+
+    # A memória é medida em uma chamada separada, pois o tracemalloc deixa tudo mais lento
+    if not warm_cache:
+        Dashboard.response_cache.clear()
+    tracemalloc.start()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return percentile(latencies, 0.5), percentile(latencies, 0.95), queries, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Tamanhos de frota a medir (padrão: 1000 10000 100000).')
+    parser.add_argument('--days', type=int, default=7, help='Dias de snapshots gerados (padrão: 7).')
+    parser.add_argument('--iterations', type=int, default=20, help='Chamadas por rota (padrão: 20).')
+    parser.add_argument('--warm-cache', action='store_true', help='Não limpa o cache de respostas entre as chamadas.')
+    parser.add_argument('--mysql-host', help='Usa um MySQL/MariaDB local no lugar do SQLite.')
+    parser.add_argument('--mysql-port', type=int, default=3306)
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default='')
+    parser.add_argument('--mysql-database', default='dashboard_bench',
+                        help='Banco dedicado ao benchmark (as tabelas são apagadas a cada frota).')
+    args = parser.parse_args()
+
+    # As linhas de log por requisição e o aviso do pandas sobre conexões DBAPI
+    # atrapalhariam a leitura do resultado
+    Dashboard.request_logger.disabled = True
+    warnings.filterwarnings('ignore', message='pandas only supports SQLAlchemy')
+    client = Dashboard.app.test_client()
+    end_date = date.today()
+
+    print(f"{'frota':>8}  {'rota':<18} {'p50 ms':>9} {'p95 ms':>9} {'consultas':>10} {'pico MB':>9}")
+    for devices in args.devices:
+        with tempfile.TemporaryDirectory() as tmp:
+            if args.mysql_host:
+                fleet.use_mysql(args.mysql_host, args.mysql_port, args.mysql_user, args.mysql_password,
+                                args.mysql_database)
+                fleet.load_mysql_database(devices, args.days, end_date)
+            else:
+                path = os.path.join(tmp, 'dados.sqlite3')
+                fleet.create_sqlite_database(path, devices, args.days, end_date)
+                fleet.use_sqlite(path)
+
+            for name, url in routes(end_date, devices):
+                p50, p95, queries, peak = measure(client, url, args.iterations, args.warm_cache)
+                print(f"{devices:>8}  {name:<18} {p50:>9.1f} {p95:>9.1f} {queries:>10} {peak:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -12,5 +12,5 @@ CREATE TABLE dados (
     dataUltimaConexao DATE,
     horaUltimaConexao TIME,
     dataUltimoRegistro DATE,
-    PRIMARY KEY (idDado, criacaoInsert, cliente)
+    PRIMARY KEY (idDado, criacaoInsert)
 );
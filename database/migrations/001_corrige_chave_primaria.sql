@@ -0,0 +1,5 @@
+-- A chave primária original referenciava a coluna inexistente "cliente".
+-- criacaoInsert permanece na chave para permitir o particionamento por data.
+ALTER TABLE dados
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (idDado, criacaoInsert);
@@ -0,0 +1,7 @@
+-- Snapshot do dia (GERAL_QUERY): filtro por criacaoInsert já na ordem do ORDER BY
+CREATE INDEX idx_dados_criacao_ordem
+    ON dados (criacaoInsert, dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro);
+
+-- Equipamentos que conectaram no dia (DIA_ATUAL_QUERY) e totalizadores de tráfego
+CREATE INDEX idx_dados_conexao
+    ON dados (dataUltimaConexao, horaUltimaConexao, statusEquip, dataUltimoRegistro);
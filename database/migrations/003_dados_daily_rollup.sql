@@ -0,0 +1,71 @@
+-- Totais diários pré-agregados do dashboard mensal (uma linha por snapshot).
+-- com_trafego: equipamentos com último registro entre o dia anterior e o dia do snapshot.
+CREATE TABLE dados_daily_rollup (
+    data DATE PRIMARY KEY,
+    total INT NOT NULL DEFAULT 0,
+    conectados INT NOT NULL DEFAULT 0,
+    desconectados INT NOT NULL DEFAULT 0,
+    com_trafego INT NOT NULL DEFAULT 0
+);
+
+-- Os triggers mantêm o rollup a cada linha inserida, alterada ou removida em dados
+CREATE TRIGGER trg_dados_rollup_insert AFTER INSERT ON dados
+FOR EACH ROW
+    INSERT INTO dados_daily_rollup (data, total, conectados, desconectados, com_trafego)
+    VALUES (
+        NEW.criacaoInsert,
+        1,
+        IF(NEW.statusEquip = 'Conectado', 1, 0),
+        IF(NEW.statusEquip = 'Desconectado', 1, 0),
+        IF(NEW.dataUltimoRegistro >= NEW.criacaoInsert - INTERVAL 1 DAY, 1, 0)
+    )
+    ON DUPLICATE KEY UPDATE
+        total = total + VALUES(total),
+        conectados = conectados + VALUES(conectados),
+        desconectados = desconectados + VALUES(desconectados),
+        com_trafego = com_trafego + VALUES(com_trafego);
+
+CREATE TRIGGER trg_dados_rollup_delete AFTER DELETE ON dados
+FOR EACH ROW
+    UPDATE dados_daily_rollup
+    SET total = total - 1,
+        conectados = conectados - IF(OLD.statusEquip = 'Conectado', 1, 0),
+        desconectados = desconectados - IF(OLD.statusEquip = 'Desconectado', 1, 0),
+        com_trafego = com_trafego - IF(OLD.dataUltimoRegistro >= OLD.criacaoInsert - INTERVAL 1 DAY, 1, 0)
+    WHERE data = OLD.criacaoInsert;
+
+CREATE TRIGGER trg_dados_rollup_update_old AFTER UPDATE ON dados
+FOR EACH ROW
+    UPDATE dados_daily_rollup
+    SET total = total - 1,
+        conectados = conectados - IF(OLD.statusEquip = 'Conectado', 1, 0),
+        desconectados = desconectados - IF(OLD.statusEquip = 'Desconectado', 1, 0),
+        com_trafego = com_trafego - IF(OLD.dataUltimoRegistro >= OLD.criacaoInsert - INTERVAL 1 DAY, 1, 0)
+    WHERE data = OLD.criacaoInsert;
+
+CREATE TRIGGER trg_dados_rollup_update_new AFTER UPDATE ON dados
+FOR EACH ROW FOLLOWS trg_dados_rollup_update_old
+    INSERT INTO dados_daily_rollup (data, total, conectados, desconectados, com_trafego)
+    VALUES (
+        NEW.criacaoInsert,
+        1,
+        IF(NEW.statusEquip = 'Conectado', 1, 0),
+        IF(NEW.statusEquip = 'Desconectado', 1, 0),
+        IF(NEW.dataUltimoRegistro >= NEW.criacaoInsert - INTERVAL 1 DAY, 1, 0)
+    )
+    ON DUPLICATE KEY UPDATE
+        total = total + VALUES(total),
+        conectados = conectados + VALUES(conectados),
+        desconectados = desconectados + VALUES(desconectados),
+        com_trafego = com_trafego + VALUES(com_trafego);
+
+-- Carga inicial com o histórico já existente
+REPLACE INTO dados_daily_rollup (data, total, conectados, desconectados, com_trafego)
+SELECT
+    criacaoInsert,
+    COUNT(*),
+    COUNT(CASE WHEN statusEquip = 'Conectado' THEN 1 END),
+    COUNT(CASE WHEN statusEquip = 'Desconectado' THEN 1 END),
+    COUNT(CASE WHEN dataUltimoRegistro >= criacaoInsert - INTERVAL 1 DAY THEN 1 END)
+FROM dados
+GROUP BY criacaoInsert;
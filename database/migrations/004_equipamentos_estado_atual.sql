@@ -0,0 +1,50 @@
+-- Estado atual de cada equipamento (uma linha por número de série), com os dados do
+-- snapshot mais recente em que ele apareceu. atualizadoEm: data desse snapshot.
+CREATE TABLE equipamentos_estado_atual (
+    numSerieEquip VARCHAR(255) PRIMARY KEY,
+    atualizadoEm DATE NOT NULL,
+    modeloEquip VARCHAR(255),
+    ipEquip VARCHAR(45),
+    portaEquip INT,
+    statusEquip ENUM('Conectado', 'Desconectado'),
+    dataUltimaConexao DATE,
+    horaUltimaConexao TIME,
+    dataUltimoRegistro DATE,
+    INDEX idx_estado_atualizado (atualizadoEm, dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro),
+    INDEX idx_estado_conexao (dataUltimaConexao, horaUltimaConexao)
+);
+
+-- Mantém o estado atual a cada linha inserida em dados (pela ingestão ou por scripts de
+-- INSERT). Linhas de snapshots mais antigos que o já gravado não sobrescrevem o estado;
+-- atualizadoEm é atribuído por último porque as comparações usam o valor antigo.
+CREATE TRIGGER trg_dados_estado_atual AFTER INSERT ON dados
+FOR EACH ROW FOLLOWS trg_dados_rollup_insert
+    INSERT INTO equipamentos_estado_atual (numSerieEquip, atualizadoEm, modeloEquip, ipEquip, portaEquip, statusEquip,
+                                           dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro)
+    SELECT NEW.numSerieEquip, NEW.criacaoInsert, NEW.modeloEquip, NEW.ipEquip, NEW.portaEquip, NEW.statusEquip,
+           NEW.dataUltimaConexao, NEW.horaUltimaConexao, NEW.dataUltimoRegistro
+    FROM DUAL
+    WHERE NEW.numSerieEquip IS NOT NULL
+    ON DUPLICATE KEY UPDATE
+        modeloEquip = IF(VALUES(atualizadoEm) >= atualizadoEm, VALUES(modeloEquip), modeloEquip),
+        ipEquip = IF(VALUES(atualizadoEm) >= atualizadoEm, VALUES(ipEquip), ipEquip),
+        portaEquip = IF(VALUES(atualizadoEm) >= atualizadoEm, VALUES(portaEquip), portaEquip),
+        statusEquip = IF(VALUES(atualizadoEm) >= atualizadoEm, VALUES(statusEquip), statusEquip),
+        dataUltimaConexao = IF(VALUES(atualizadoEm) >= atualizadoEm, VALUES(dataUltimaConexao), dataUltimaConexao),
+        horaUltimaConexao = IF(VALUES(atualizadoEm) >= atualizadoEm, VALUES(horaUltimaConexao), horaUltimaConexao),
+        dataUltimoRegistro = IF(VALUES(atualizadoEm) >= atualizadoEm, VALUES(dataUltimoRegistro), dataUltimoRegistro),
+        atualizadoEm = GREATEST(atualizadoEm, VALUES(atualizadoEm));
+
+-- Carga inicial com o snapshot mais recente de cada equipamento
+REPLACE INTO equipamentos_estado_atual (numSerieEquip, atualizadoEm, modeloEquip, ipEquip, portaEquip, statusEquip,
+                                        dataUltimaConexao, horaUltimaConexao, dataUltimoRegistro)
+SELECT d.numSerieEquip, d.criacaoInsert, d.modeloEquip, d.ipEquip, d.portaEquip, d.statusEquip,
+       d.dataUltimaConexao, d.horaUltimaConexao, d.dataUltimoRegistro
+FROM dados d
+JOIN (
+    SELECT numSerieEquip, MAX(criacaoInsert) AS criacaoInsert
+    FROM dados
+    WHERE numSerieEquip IS NOT NULL
+    GROUP BY numSerieEquip
+) ultimo ON ultimo.numSerieEquip = d.numSerieEquip AND ultimo.criacaoInsert = d.criacaoInsert
+ORDER BY d.idDado;
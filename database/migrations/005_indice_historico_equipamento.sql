@@ -0,0 +1,4 @@
+-- Histórico de um equipamento (HISTORICO_EQUIPAMENTO_QUERY): busca por número de série
+-- e intervalo de criacaoInsert, cobrindo as colunas usadas nas métricas
+CREATE INDEX idx_dados_equipamento_historico
+    ON dados (numSerieEquip, criacaoInsert, statusEquip, dataUltimoRegistro);
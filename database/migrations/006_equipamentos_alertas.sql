@@ -0,0 +1,18 @@
+-- Alertas dos equipamentos no snapshot mais recente, recalculados pelo comando
+-- detect-alerts: uma linha por equipamento e tipo de alerta. detectadoEm: execução que
+-- encontrou o problema pela primeira vez; atualizadoEm: última execução que o confirmou.
+CREATE TABLE equipamentos_alertas (
+    numSerieEquip VARCHAR(255) NOT NULL,
+    tipo ENUM('sem_trafego', 'conexao_atrasada') NOT NULL,
+    modeloEquip VARCHAR(255),
+    diasSemTrafego INT,
+    horasSemConexao INT,
+    dataUltimaConexao DATE,
+    horaUltimaConexao TIME,
+    dataUltimoRegistro DATE,
+    detectadoEm DATETIME NOT NULL,
+    atualizadoEm DATETIME NOT NULL,
+    PRIMARY KEY (numSerieEquip, tipo),
+    INDEX idx_alertas_tipo (tipo, diasSemTrafego, horasSemConexao),
+    INDEX idx_alertas_modelo (modeloEquip, tipo)
+);
@@ -0,0 +1,4 @@
+-- Página da tabela de dados ordenada por último tráfego (/api/dados?sort=registro):
+-- filtro por criacaoInsert já na ordem do ORDER BY, como idx_dados_criacao_ordem
+CREATE INDEX idx_dados_criacao_registro
+    ON dados (criacaoInsert, dataUltimoRegistro, dataUltimaConexao, horaUltimaConexao);
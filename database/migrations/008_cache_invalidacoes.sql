@@ -0,0 +1,8 @@
+-- Invalidações do cache de respostas, compartilhadas pelos processos do servidor
+-- (workers do gunicorn): cada processo lê as linhas novas e descarta as páginas da
+-- dataReferencia (NULL = todas). As linhas antigas são apagadas pela própria aplicação.
+CREATE TABLE cache_invalidacoes (
+    idInvalidacao BIGINT AUTO_INCREMENT PRIMARY KEY,
+    dataReferencia DATE NULL,
+    criadoEm TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
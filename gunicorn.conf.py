@@ -0,0 +1,43 @@
+# Configuração do gunicorn para produção:
+#
+#     gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Os valores podem ser ajustados pelas variáveis de ambiente abaixo, sem editar o arquivo.
+
+import multiprocessing
+import os
+
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8000')
+
+# Um processo por núcleo: pandas e a montagem dos gráficos usam CPU e ficam presos ao GIL,
+# então é com processos que o dashboard usa todos os núcleos
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count()))
+
+# Threads por processo: enquanto uma requisição espera o banco, outras são atendidas.
+# Cada conexão de status ao vivo (/api/status/stream) ocupa uma thread enquanto a página
+# estiver aberta, então aumente este valor se houver muitas telas acompanhando o dashboard
+worker_class = 'gthread'
+threads = int(os.environ.get('DASHBOARD_THREADS', 8))
+
+# Importa o Dashboard (pandas, plotly, Flask) uma única vez antes do fork: os workers
+# sobem mais rápido e compartilham essa memória. Pool de conexões, threads de consulta e
+# status ao vivo são recriados em cada worker (ver reset_after_fork no Dashboard.py).
+# O cache de respostas também é de cada worker; as invalidações passam pela tabela
+# cache_invalidacoes e as versões do status ao vivo levam a época do worker. /metrics,
+# /pool-stats e /cache-stats mostram só o worker que atendeu a requisição.
+# Cada worker abre até DASHBOARD_POOL_SIZE conexões: workers x pool deve caber no
+# max_connections do MySQL
+preload_app = True
+
+# Maior que o timeout das consultas (query_config) para que elas desistam antes do worker
+timeout = int(os.environ.get('DASHBOARD_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Recicla os workers de tempos em tempos para devolver a memória fragmentada pelos DataFrames
+max_requests = int(os.environ.get('DASHBOARD_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+# O Dashboard já registra cada requisição em JSON; o gunicorn registra só os erros
+errorlog = '-'
+loglevel = os.environ.get('DASHBOARD_LOG_LEVEL', 'info')
@@ -0,0 +1,86 @@
+// Comportamento comum aos dashboards diário e mensal: menu lateral, overlay de
+// carregamento, seletor de data/mês e tabela de dados carregada conforme a rolagem.
+
+// Colunas da tabela de dados, na ordem das células de cada linha
+var DADOS_COLUMNS = ['modeloEquip', 'numSerieEquip', 'ipEquip', 'portaEquip', 'statusEquip',
+                     'dataUltimaConexao', 'horaUltimaconexao', 'dataUltimoRegistro'];
+
+function openNav() {
+    document.getElementById("mySidebar").style.left = "0";
+    document.getElementById("myOverlay").style.display = "block";
+}
+function closeNav() {
+    document.getElementById("mySidebar").style.left = "-250px";
+    document.getElementById("myOverlay").style.display = "none";
+}
+
+// Preenche (ou cria) as células da linha com uma linha vinda de /api/dados
+function fillRow(tr, row) {
+    // Equipamentos com alerta (/api/alertas) em vermelho, com os tipos no title. Linhas
+    // sem o campo alertas (status ao vivo) mantêm os alertas que a linha já tinha
+    var alertas = row.alertas || (tr.dataset.alertas ? tr.dataset.alertas.split(',') : []);
+    tr.dataset.alertas = alertas.join(',');
+    tr.className = alertas.length ? 'table-danger' : (row.destaque ? 'bg-warning' : '');
+    tr.title = alertas.length ? 'Alertas: ' + alertas.join(', ') : '';
+    DADOS_COLUMNS.forEach(function(column, i) {
+        var td = tr.cells[i] || tr.appendChild(document.createElement('td'));
+        // Nulos aparecem como 'None', igual à primeira página gerada no servidor
+        td.textContent = row[column] === null ? 'None' : row[column];
+    });
+    return tr;
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    var loadingOverlay = document.getElementById('loadingOverlay');
+
+    // Seletor de data (diário) ou de mês (mensal): envia o formulário ao mudar
+    var picker = document.getElementById('datePicker') || document.getElementById('monthPicker');
+    picker.addEventListener('change', function() {
+        loadingOverlay.style.display = 'flex'; // Exibe o overlay de carregamento
+        document.getElementById('dateForm').submit();
+    });
+
+    // Links do menu exibem o carregamento antes de navegar
+    [['dailyLink', '/'], ['monthlyLink', '/dashboard-mensal']].forEach(function(link) {
+        document.getElementById(link[0]).addEventListener('click', function(event) {
+            event.preventDefault(); // Previne o comportamento padrão de navegação
+            loadingOverlay.style.display = 'flex';
+            setTimeout(function() {
+                window.location.href = link[1];
+            }, 500); // Tempo de atraso para simular carregamento
+        });
+    });
+
+    // Oculta o overlay de carregamento quando a página é carregada
+    window.addEventListener('load', function() {
+        loadingOverlay.style.display = 'none';
+    });
+
+    // Tabela de dados: o HTML traz só a primeira página e as próximas são buscadas
+    // em /api/dados conforme a tabela é rolada
+    var tableContainer = document.getElementById('tableContainer');
+    var loadingRows = false;
+
+    function loadMoreRows() {
+        var cursor = tableContainer.dataset.nextCursor;
+        if (!cursor || loadingRows) {
+            return;
+        }
+        loadingRows = true;
+        fetch('/api/dados?cursor=' + encodeURIComponent(cursor))
+            .then(function(response) { return response.json(); })
+            .then(function(page) {
+                var tbody = tableContainer.querySelector('tbody');
+                page.rows.forEach(function(row) { tbody.appendChild(fillRow(document.createElement('tr'), row)); });
+                tableContainer.dataset.nextCursor = page.next_cursor || '';
+                loadingRows = false;
+            })
+            .catch(function() { loadingRows = false; });
+    }
+
+    tableContainer.addEventListener('scroll', function() {
+        if (tableContainer.scrollTop + tableContainer.clientHeight >= tableContainer.scrollHeight - 200) {
+            loadMoreRows();
+        }
+    });
+});
@@ -0,0 +1,75 @@
+// Gráficos dos dashboards. O servidor envia só os dados de cada gráfico
+// (/api/graficos/diario e /api/graficos/mensal); o layout comum fica aqui,
+// em cache no navegador.
+
+var LAYOUTS = {
+    pizza: {
+        title: { font: { size: 22 }, x: 0.5 },          // Título maior e centralizado
+        legend: {
+            title: { font: { size: 12 } },
+            font: { size: 12 },
+            orientation: 'h',                           // Legenda na horizontal, abaixo do gráfico
+            yanchor: 'top',
+            y: -0.2,
+            x: 0.5,
+            xanchor: 'center'
+        }
+    },
+    linha: {
+        title: { font: { size: 22 }, x: 0.5 },
+        height: 700,
+        plot_bgcolor: 'white',
+        legend: { title: { text: 'Legenda', font: { size: 12 } }, font: { size: 12 } },
+        xaxis: {
+            title: { text: 'Data' },
+            tickformat: '%d/%m',                        // Data no formato dia/mês
+            mirror: true,
+            ticks: 'outside',
+            showline: true,
+            linecolor: 'lightgrey',
+            gridcolor: 'lightgrey'
+        },
+        yaxis: {
+            title: { text: 'Quantidade' },
+            mirror: true,
+            ticks: 'outside',
+            showline: true,
+            linecolor: 'lightgrey',
+            gridcolor: 'lightgrey'
+        }
+    }
+};
+
+var TRACES = {
+    pizza: { type: 'pie', textfont: { size: 30 } },     // Valores em fonte grande
+    linha: { type: 'scatter', mode: 'lines+markers', marker: { size: 12 } }
+};
+
+function mergeDeep(base, extra) {
+    var result = {};
+    Object.keys(base).forEach(function(key) { result[key] = base[key]; });
+    Object.keys(extra).forEach(function(key) {
+        var value = extra[key];
+        var isObject = value && typeof value === 'object' && !Array.isArray(value);
+        result[key] = isObject && result[key] ? mergeDeep(result[key], value) : value;
+    });
+    return result;
+}
+
+function renderChart(element, spec) {
+    var data = spec.data.map(function(trace) { return mergeDeep(TRACES[spec.tipo], trace); });
+    Plotly.newPlot(element, data, mergeDeep(LAYOUTS[spec.tipo], spec.layout), { responsive: true });
+}
+
+// targets: { nome do gráfico na resposta: id do elemento onde desenhá-lo }
+function loadCharts(url, targets) {
+    return fetch(url)
+        .then(function(response) { return response.json(); })
+        .then(function(charts) {
+            Object.keys(targets).forEach(function(name) {
+                if (charts[name]) {
+                    renderChart(document.getElementById(targets[name]), charts[name]);
+                }
+            });
+        });
+}
@@ -0,0 +1,77 @@
+// Status ao vivo do dashboard diário. /api/status/stream (Server-Sent Events) envia só
+// os totalizadores e as linhas de equipamentos que mudaram, e a página é atualizada no
+// lugar, sem recarregar. Usa fillRow de dashboard.js.
+
+// Recarrega a primeira página da tabela (quando o servidor não tem mais as versões
+// intermediárias e manda o estado completo)
+function reloadTable(options) {
+    fetch('/api/dados?date=' + encodeURIComponent(options.date))
+        .then(function(response) { return response.json(); })
+        .then(function(page) {
+            var tbody = options.tableContainer.querySelector('tbody');
+            tbody.innerHTML = '';
+            page.rows.forEach(function(row) { tbody.appendChild(fillRow(document.createElement('tr'), row)); });
+            options.tableContainer.dataset.nextCursor = page.next_cursor || '';
+        });
+}
+
+function applyStatus(status, options) {
+    // Virou o dia: o dashboard passa a ser de outra data
+    if (status.date !== options.date) {
+        window.location.reload();
+        return;
+    }
+
+    Object.keys(status.contadores).forEach(function(name) {
+        document.querySelectorAll('[data-contador="' + name + '"]').forEach(function(element) {
+            element.textContent = status.contadores[name];
+        });
+    });
+
+    if (status.graficos) {
+        Object.keys(options.chartTargets).forEach(function(name) {
+            if (status.graficos[name]) {
+                renderChart(document.getElementById(options.chartTargets[name]), status.graficos[name]);
+            }
+        });
+    }
+
+    var tbody = options.tableContainer.querySelector('tbody');
+    if (!tbody) {
+        return;
+    }
+    if (status.completo) {
+        reloadTable(options);
+        return;
+    }
+
+    // Só as linhas já carregadas na tabela são atualizadas; as demais vêm atualizadas
+    // de /api/dados quando a tabela for rolada
+    var rowsBySerial = {};
+    Array.prototype.forEach.call(tbody.rows, function(tr) {
+        rowsBySerial[tr.cells[1].textContent.trim()] = tr;
+    });
+    status.linhas.forEach(function(row) {
+        if (rowsBySerial[row.numSerieEquip]) {
+            fillRow(rowsBySerial[row.numSerieEquip], row);
+        }
+    });
+    status.removidos.forEach(function(serial) {
+        if (rowsBySerial[serial]) {
+            rowsBySerial[serial].remove();
+        }
+    });
+}
+
+// options: { date: data do dashboard, chartTargets: { gráfico: id do elemento }, tableContainer: elemento da tabela }
+function startLiveStatus(url, options) {
+    if (!window.EventSource) {
+        return null;
+    }
+    // O EventSource reconecta sozinho e envia a última versão recebida (Last-Event-ID)
+    var source = new EventSource(url);
+    source.addEventListener('status', function(message) {
+        applyStatus(JSON.parse(message.data), options);
+    });
+    return source;
+}
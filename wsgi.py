@@ -0,0 +1,10 @@
+"""Ponto de entrada WSGI para servidores de produção.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+As configurações do banco e do pool vêm das variáveis de ambiente DASHBOARD_* (ver README).
+"""
+
+from Dashboard import create_app
+
+app = create_app()